@@ -1,6 +1,14 @@
-from utils import clean_and_parse_json
+from compaction import FEATURE_BUDGETS, compact_inputs, compact_jd, compact_resume, estimate_tokens
+from jd_profile import format_requirements
+from llm import generate_structured
+from prescore import tokenize
+from schemas import CANDIDATE_BATCH_SCHEMA, CANDIDATE_SCHEMA, MATCH_ANALYSIS_SCHEMA, validate
 
-def get_match_analysis(model, job_desc, resume_text):
+def get_match_analysis(model, job_desc, resume_text, requirements=None):
+    # With pre-extracted JD requirements the prompt carries those instead of the full JD
+    if requirements:
+        job_desc = format_requirements(requirements)
+    resume_text, job_desc = compact_inputs("match_analysis", resume_text, job_desc)
     prompt = f"""
     Act as an expert ATS scanner. Analyze the JD and Resume.
     Return ONLY valid JSON with this exact structure:
@@ -18,5 +26,118 @@ def get_match_analysis(model, job_desc, resume_text):
     JD: {job_desc}
     Resume: {resume_text}
     """
-    response = model.generate_content(prompt)
-    return clean_and_parse_json(response.text)
\ No newline at end of file
+    return generate_structured(model, prompt, MATCH_ANALYSIS_SCHEMA)
+
+def get_candidate_score(model, resume_text, job_desc, requirements=None):
+    if requirements:
+        job_desc = format_requirements(requirements)
+    resume_text, job_desc = compact_inputs("candidate", resume_text, job_desc)
+    prompt = f"""
+    Act as a Senior Career Strategist. Perform a deep-dive analysis of this resume against the JD.
+    RESUME: {resume_text}
+    JD: {job_desc}
+
+    Return a valid JSON object with these exact keys:
+    {{
+        "match_score": 85, 
+        "match_level": "High / Medium / Low",
+        "executive_summary": "A detailed 4-5 sentence paragraph analyzing the fit. Be specific about years of experience, domain knowledge, and major red flags.",
+        "strengths": ["List 3-4 major strengths found in the resume"],
+        "missing_skills": ["List 4-5 specific technical or soft skills MISSING from the resume that are in the JD"],
+        "recommendations": [
+            {{
+                "title": "Recommendation 1 Title",
+                "description": "A comprehensive 3-sentence paragraph explaining exactly HOW to fix this and WHY it matters."
+            }},
+            {{
+                "title": "Recommendation 2 Title",
+                "description": "Detailed advice..."
+            }}
+        ]
+    }}
+    """
+    return generate_structured(model, prompt, CANDIDATE_SCHEMA, allow_partial=True)
+
+# Batched triage: several compacted resumes share one request (and one copy
+# of the instructions and JD). Entries that come back missing or invalid are
+# split out and scored one by one with get_candidate_score.
+MAX_BATCH_SIZE = 8
+
+def plan_batches(texts, budget=None, max_size=MAX_BATCH_SIZE):
+    # Groups indices so each batch's resumes fit the token budget; each resume
+    # counts at most its compacted size
+    budget = budget or FEATURE_BUDGETS["candidate_batch"]
+    per_resume = FEATURE_BUDGETS["candidate"]
+    batches, current, used = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = min(estimate_tokens(text), per_resume)
+        if current and (used + tokens > budget or len(current) >= max_size):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _valid_score(entry):
+    return isinstance(entry, dict) and isinstance(entry.get("match_score"), (int, float)) and not validate(entry, CANDIDATE_SCHEMA)
+
+def get_candidate_scores(model, resume_texts, job_desc, requirements=None):
+    # Returns one analysis (or None) per resume, in input order. Resumes are
+    # labelled C1..Cn in the prompt, so same-named uploads cannot collide.
+    if requirements:
+        job_desc = format_requirements(requirements)
+    if len(resume_texts) <= 1:
+        return [get_candidate_score(model, text, job_desc) for text in resume_texts]
+
+    jd = compact_jd(job_desc)
+    keywords = set(tokenize(jd)) if jd else None
+    resumes = "\n\n".join(
+        f"=== CANDIDATE C{n} ===\n{compact_resume('candidate', text, keywords)}"
+        for n, text in enumerate(resume_texts, start=1)
+    )
+    prompt = f"""
+    Act as a Senior Career Strategist. Analyze EACH of the {len(resume_texts)} resumes below against the same JD, independently.
+    JD: {jd}
+
+    RESUMES:
+    {resumes}
+
+    Return a valid JSON object {{"candidates": [...]}} with exactly one entry per resume, in the same order.
+    Each entry has these exact keys, and "candidate_id" is the id from its CANDIDATE header (C1, C2, ...):
+    {{
+        "candidate_id": "C1",
+        "match_score": 85,
+        "match_level": "High / Medium / Low",
+        "executive_summary": "A 3-4 sentence paragraph on the fit: years of experience, domain knowledge, major red flags.",
+        "strengths": ["3-4 major strengths found in the resume"],
+        "missing_skills": ["4-5 specific skills MISSING from the resume that are in the JD"],
+        "recommendations": [{{"title": "Recommendation title", "description": "2-3 sentences on HOW to fix this and WHY it matters."}}]
+    }}
+    """
+    try:
+        data = generate_structured(model, prompt, CANDIDATE_BATCH_SCHEMA, max_repairs=0, allow_partial=True)
+    except Exception:
+        data = None
+    entries = {}
+    for entry in (data or {}).get("candidates", []):
+        # An entry without a usable id cannot be matched to a resume; its
+        # resume falls through to the single-candidate retry below
+        candidate_id = entry.get("candidate_id") if isinstance(entry, dict) else None
+        if candidate_id is None or not _valid_score(entry):
+            continue
+        entry = {k: v for k, v in entry.items() if k != "candidate_id"}
+        entries.setdefault(str(candidate_id).strip().upper(), entry)
+
+    results = []
+    for n, text in enumerate(resume_texts, start=1):
+        entry = entries.get(f"C{n}")
+        if entry is None:
+            # Retry on its own; a single-candidate failure stays a failure
+            try:
+                entry = get_candidate_score(model, text, job_desc)
+            except Exception:
+                entry = None
+        results.append(entry)
+    return results
\ No newline at end of file
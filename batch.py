@@ -0,0 +1,25 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_WORKERS = 4
+MAX_WORKERS = 16
+
+def run_concurrently(items, worker, max_workers=DEFAULT_WORKERS):
+    # Runs worker(item) on a bounded thread pool and yields (item, result)
+    # pairs in completion order, so the UI can render each result as soon
+    # as its Gemini call returns instead of waiting on upload order.
+    # A worker that raises yields None, like the rest of the app does.
+    max_workers = max(1, min(int(max_workers), MAX_WORKERS))
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        # Each task runs in a copy of the caller's context (run metrics, session)
+        futures = {pool.submit(contextvars.copy_context().run, worker, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result()
+            except Exception:
+                yield item, None
+    finally:
+        # If the caller stops early (Ctrl-C, Streamlit rerun) queued work is dropped
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,160 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+
+from analysis import get_candidate_score
+from batch import run_concurrently, DEFAULT_WORKERS, MAX_WORKERS
+from llm import deadline, set_hedging
+from model_registry import ModelRegistry
+from prescore import score_resumes, select_for_deep_analysis
+from extraction import MAX_PAGES, extract_many
+from jd_profile import get_jd_requirements
+from utils import file_fingerprint
+
+# Headless batch analysis for directory-scale runs:
+#
+#   python batch_cli.py resumes/ --jd backend.txt --jd data.txt --out results.jsonl
+#
+# Every finished (resume, JD) pair is appended to the output JSONL as soon
+# as it completes. Re-running the same command skips pairs that already
+# have an "ok" line, so an interrupted run resumes without new API calls.
+
+def find_resumes(patterns):
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*.pdf")
+        paths.extend(p for p in glob.glob(pattern, recursive=True) if p.lower().endswith(".pdf"))
+    return sorted(set(paths))
+
+def load_checkpoint(path):
+    # Latest status per (resume_hash, jd_hash) pair
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut off by a crash is simply redone
+            done[(row["resume_hash"], row["jd_hash"])] = row.get("status")
+    return done
+
+def load_resumes(paths, max_pages=MAX_PAGES):
+    resumes = []
+    for path, result in zip(paths, extract_many(paths, max_pages=max_pages)):
+        if result["error"] or not (result["text"] or "").strip():
+            print(f"skipping {path}: {result['error'] or 'no extractable text'}", file=sys.stderr)
+            continue
+        resumes.append({"path": path, "hash": result["fingerprint"], "text": result["text"], "extract_seconds": result["seconds"]})
+    return resumes
+
+def load_jds(paths):
+    jds = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        jds.append({"path": path, "hash": file_fingerprint(text.encode("utf-8")), "text": text})
+    return jds
+
+def plan_tasks(resumes, jds, done, top_k=0, min_score=0):
+    # Local pre-scoring decides which pairs earn a Gemini call, exactly as in the app
+    tasks, screened = [], []
+    for jd in jds:
+        scores = score_resumes(jd["text"], [r["text"] for r in resumes])
+        selected = select_for_deep_analysis(scores, top_k, min_score)
+        for resume, score, keep in zip(resumes, scores, selected):
+            status = done.get((resume["hash"], jd["hash"]))
+            if status == "ok" or (status == "screened" and not keep):
+                continue
+            task = {"resume": resume, "jd": jd, "local_score": float(score)}
+            (tasks if keep else screened).append(task)
+    return tasks, screened
+
+def result_row(task, status, analysis=None, seconds=0.0):
+    return {
+        "resume": task["resume"]["path"],
+        "resume_hash": task["resume"]["hash"],
+        "jd": task["jd"]["path"],
+        "jd_hash": task["jd"]["hash"],
+        "status": status,
+        "local_score": task["local_score"],
+        "match_score": analysis.get("match_score") if analysis else None,
+        "analysis": analysis,
+        "seconds": round(seconds, 3),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a directory of resumes against one or more job descriptions.")
+    parser.add_argument("resumes", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("--jd", action="append", required=True, help="Job description text file (repeatable)")
+    parser.add_argument("--out", default="results.jsonl", help="JSONL output, also used as the resume checkpoint")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Parallel Gemini requests (max {MAX_WORKERS})")
+    parser.add_argument("--top-k", type=int, default=0, help="Deep-analyze only the best K resumes per JD (0 = all)")
+    parser.add_argument("--min-local-score", type=float, default=0, help="Skip resumes below this local score")
+    parser.add_argument("--max-pages", type=int, default=MAX_PAGES, help="Pages extracted per PDF")
+    parser.add_argument("--deadline", type=float, default=0, help="Seconds for the whole run; calls still pending then fail and are retried on the next run")
+    parser.add_argument("--hedge", action="store_true", help="Send a duplicate request when a call outlives the model's p95 latency")
+    parser.add_argument("--model", help="Serve every model tier with this model instead of the configured ones")
+    args = parser.parse_args(argv)
+
+    resume_paths = find_resumes(args.resumes)
+    if not resume_paths:
+        parser.error("no PDF files matched")
+    started = time.perf_counter()
+    resumes = load_resumes(resume_paths, args.max_pages)
+    print(f"extracted {len(resumes)}/{len(resume_paths)} PDFs in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    jds = load_jds(args.jd)
+    done = load_checkpoint(args.out)
+    tasks, screened = plan_tasks(resumes, jds, done, args.top_k, args.min_local_score)
+    already_done = sum(done.get((r["hash"], jd["hash"])) == "ok" for r in resumes for jd in jds)
+    print(
+        f"{len(resumes)} resumes × {len(jds)} JDs: {already_done} already done, "
+        f"{len(tasks)} to analyze, {len(screened)} screened locally",
+        file=sys.stderr,
+    )
+
+    # --model still goes through the registry so tier slots, timeouts and hedging apply
+    registry = ModelRegistry()
+    if args.model:
+        registry.pin(args.model)
+    model, jd_model = registry.model_for("candidate"), registry.model_for("jd_requirements")
+    for jd in {id(t["jd"]): t["jd"] for t in tasks}.values():
+        try:
+            jd["requirements"] = get_jd_requirements(jd_model, jd["text"])
+        except Exception as e:
+            print(f"{jd['path']}: requirement extraction failed ({e}); using the full JD", file=sys.stderr)
+
+    def process(task):
+        started = time.perf_counter()
+        analysis = get_candidate_score(model, task["resume"]["text"], task["jd"]["text"], task["jd"].get("requirements"))
+        return analysis, time.perf_counter() - started
+
+    set_hedging(args.hedge)
+    failures = 0
+    run_deadline = deadline(args.deadline - (time.perf_counter() - started)) if args.deadline else contextlib.nullcontext()
+    with open(args.out, "a", encoding="utf-8") as out, run_deadline:
+        for task in screened:
+            out.write(json.dumps(result_row(task, "screened")) + "\n")
+        out.flush()
+        try:
+            for done_count, (task, outcome) in enumerate(run_concurrently(tasks, process, args.workers), start=1):
+                analysis, seconds = outcome if outcome else (None, 0.0)
+                ok = bool(analysis) and isinstance(analysis.get("match_score"), (int, float))
+                failures += not ok
+                out.write(json.dumps(result_row(task, "ok" if ok else "error", analysis, seconds)) + "\n")
+                out.flush()
+                print(f"[{done_count}/{len(tasks)}] {task['resume']['path']} × {task['jd']['path']}: "
+                      f"{analysis['match_score'] if ok else 'failed'}", file=sys.stderr)
+        except KeyboardInterrupt:
+            print("interrupted; re-run the same command to resume", file=sys.stderr)
+            return 130
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
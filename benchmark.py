@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Always a fresh cache directory: bench_batch clears the response cache, and
+# it must never be the user's real one (even when JOBFIT_CACHE_DIR is set)
+os.environ["JOBFIT_CACHE_DIR"] = tempfile.mkdtemp(prefix="jobfit-bench-")
+
+from analysis import get_candidate_score
+from batch import run_concurrently
+from extraction import extract_many
+import llm
+import ratelimit
+from fake_model import FakeModel
+from schemas import CANDIDATE_SCHEMA, generation_config
+from utils import IncrementalJSONParser, clean_and_parse_json, clear_text_cache, extract_text_from_pdf
+
+# Offline throughput benchmark for extraction, JSON parsing and batch
+# analysis. Runs against FakeModel by default, so no API key is needed:
+#
+#   python benchmark.py --resumes 60 --pages 1,3,10   # deterministic, one worker
+#   python benchmark.py --workers 8                    # concurrent batch throughput
+#   python benchmark.py --model gemini-2.5-flash       # same harness, live API
+
+SKILLS = [
+    "Python", "Django", "FastAPI", "AWS", "GCP", "Kubernetes", "Docker", "PostgreSQL", "Redis", "Kafka",
+    "React", "TypeScript", "Terraform", "Spark", "Airflow", "PyTorch", "SQL", "Go", "Java", "CI/CD",
+]
+VERBS = ["Built", "Led", "Designed", "Migrated", "Optimized", "Automated", "Shipped", "Scaled"]
+
+JD_TEXT = """Senior Backend Engineer
+We are hiring a backend engineer to build data-intensive services.
+Required: 5+ years Python, Django or FastAPI, PostgreSQL, AWS, Docker, Kubernetes.
+Nice to have: Kafka, Terraform, Airflow, experience mentoring engineers.
+"""
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages):
+    # Minimal valid PDF: one Helvetica text stream per page
+    objects = {1: "<< /Type /Catalog /Pages 2 0 R >>", 3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids, next_id = [], 4
+    for lines in pages:
+        stream = "BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(f"({_pdf_escape(l)}) Tj T*" for l in lines) + " ET"
+        objects[next_id] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"
+        objects[next_id + 1] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {next_id} 0 R >>"
+        )
+        kids.append(next_id + 1)
+        next_id += 2
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n{objects[obj_id]}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offsets[i]:010d} 00000 n \n" for i in sorted(objects)).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+def synthetic_resume(index, pages, rng):
+    name = f"Candidate {index:04d}"
+    body = []
+    for page in range(pages):
+        lines = [f"{name} - Resume", "EXPERIENCE:" if page == 0 else "PROJECTS:"]
+        for _ in range(45):
+            skills = ", ".join(rng.sample(SKILLS, 3))
+            lines.append(f"- {rng.choice(VERBS)} services with {skills}, improving throughput by {rng.randint(5, 80)}%")
+        lines.append(f"Page {page + 1} of {pages}")
+        body.append(lines)
+    return make_pdf(body)
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+TRACE_MEMORY = False
+
+def measure(name, items, func, workers=1):
+    # Runs func over items and reports throughput, latency percentiles and,
+    # with --trace-memory, peak Python allocations (tracing slows the run)
+    latencies, failures = [], 0
+
+    def timed(item):
+        started = time.perf_counter()
+        ok = func(item)
+        return time.perf_counter() - started, ok
+
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    started = time.perf_counter()
+    for _, outcome in run_concurrently(items, timed, workers):
+        if outcome is None:
+            failures += 1
+            continue
+        latency, ok = outcome
+        latencies.append(latency)
+        failures += not ok
+    wall = time.perf_counter() - started
+    peak = None
+    if TRACE_MEMORY:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "benchmark": name,
+        "items": len(items),
+        "failures": failures,
+        "seconds": round(wall, 3),
+        "throughput_per_s": round(len(items) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "peak_traced_mb": round(peak / 1e6, 2) if peak is not None else None,
+    }
+
+def bench_extraction(pdfs):
+    results = []
+    clear_text_cache()
+    results.append(measure("extract (serial)", pdfs, lambda pdf: bool(extract_text_from_pdf(pdf))))
+    clear_text_cache()
+    started = time.perf_counter()
+    extracted = extract_many(pdfs)
+    wall = time.perf_counter() - started
+    per_file = [r["seconds"] for r in extracted]
+    results.append({
+        "benchmark": "extract (process pool)",
+        "items": len(pdfs),
+        "failures": sum(bool(r["error"]) for r in extracted),
+        "seconds": round(wall, 3),
+        "throughput_per_s": round(len(pdfs) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(per_file, 50) * 1000, 2),
+        "p95_ms": round(percentile(per_file, 95) * 1000, 2),
+        "p99_ms": round(percentile(per_file, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(per_file) * 1000, 2) if per_file else 0.0,
+        "peak_traced_mb": None,
+    })
+    return results
+
+def bench_parsing(count, rng):
+    fake = FakeModel(latency=0, jitter=0)
+    replies = []
+    for i in range(count):
+        text = fake.generate_content(f"reply {i}", generation_config=generation_config(CANDIDATE_SCHEMA)).text
+        # A quarter of replies are cut off mid-way, as a truncated generation would be
+        replies.append(text[: rng.randint(len(text) // 2, len(text))] if i % 4 == 0 else text)
+
+    def streamed(text):
+        parser = IncrementalJSONParser()
+        for i in range(0, len(text), 64):
+            parser.feed(text[i:i + 64])
+        return parser.result() is not None
+
+    return [
+        measure("json parse (whole reply)", replies, lambda t: clean_and_parse_json(t) is not None),
+        measure("json parse (streamed)", replies, streamed),
+    ]
+
+def bench_batch(model, texts, workers):
+    llm.response_cache.clear()  # every run pays for its calls
+    return [measure(f"batch analysis ({workers} workers)", texts, lambda t: bool(get_candidate_score(model, t, JD_TEXT)), workers)]
+
+def print_table(rows):
+    columns = ["benchmark", "items", "failures", "seconds", "throughput_per_s", "p50_ms", "p95_ms", "p99_ms", "peak_traced_mb"]
+    widths = {c: max(len(c), *(len(str(r.get(c))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row.get(c)).ljust(widths[c]) for c in columns))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline performance benchmark for the JobFit pipeline.")
+    parser.add_argument("--resumes", type=int, default=40, help="Synthetic resumes to generate")
+    parser.add_argument("--pages", default="1,2,5", help="Comma-separated page counts to cycle through")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Concurrent model calls in the batch benchmark; above 1, fake latencies depend on thread scheduling")
+    parser.add_argument("--latency", type=float, default=0.4, help="Fake model mean latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.15, help="Fake model latency standard deviation")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fake model share of failed calls")
+    parser.add_argument("--model", default="fake", help='"fake" or a Gemini model name for a live run')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="Record peak Python allocations per benchmark")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    global TRACE_MEMORY
+    TRACE_MEMORY = args.trace_memory
+
+    rng = random.Random(args.seed)
+    page_counts = [int(p) for p in args.pages.split(",")]
+    pdfs = [synthetic_resume(i, page_counts[i % len(page_counts)], rng) for i in range(args.resumes)]
+
+    if args.model == "fake":
+        model = FakeModel(args.latency, args.jitter, args.failure_rate, args.seed)
+        # The shared Gemini quota limiter would otherwise dominate the timings
+        ratelimit.set_default_limiter(ratelimit.UnlimitedLimiter())
+    else:
+        model = llm.load_model(args.model)
+
+    rows = bench_extraction(pdfs)
+    rows += bench_parsing(max(200, args.resumes), rng)
+    texts = [extract_text_from_pdf(pdf) for pdf in pdfs]
+    rows += bench_batch(model, texts, args.workers)
+
+    print_table(rows)
+    print(f"\npeak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB", file=sys.stderr)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
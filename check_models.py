@@ -2,14 +2,26 @@ import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 
+from model_registry import ModelRegistry, fetch_available_models
+
 load_dotenv()
 api_key = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=api_key)
 
 print("Searching for available models...")
 try:
-    for m in genai.list_models():
-        if 'generateContent' in m.supported_generation_methods:
-            print(f"- {m.name}")
+    # Also refreshes the cached list the model registry routes against
+    available = fetch_available_models()
+    for name in available:
+        print(f"- {name}")
 except Exception as e:
-    print(f"Error: {e}")
\ No newline at end of file
+    print(f"Error: {e}")
+    available = None
+
+print("\nFeature routing:")
+registry = ModelRegistry(available=set(available) if available is not None else None)
+for name, tier in registry.tiers.items():
+    status = "" if available is None or tier["model"] in available else "  (not available, falls back)"
+    print(f"- tier {name}: {tier['model']} · concurrency {tier.get('concurrency')} · timeout {tier.get('timeout')}s{status}")
+for row in registry.describe():
+    print(f"- {row['Feature']}: {row['Tier']} ({row['Model']})")
\ No newline at end of file
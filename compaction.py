@@ -0,0 +1,139 @@
+import json
+import os
+import re
+from collections import Counter
+
+from prescore import tokenize
+from sections import slice_for
+from utils import PAGE_BREAK
+
+# Prompt compaction for resume and JD text. PDF extraction leaves repeated
+# page headers/footers, ragged whitespace and hyphenated line breaks, all of
+# which are paid for as input tokens on every call. Text is cleaned first,
+# then trimmed to a per-feature token budget by dropping the lines that
+# carry the least signal.
+CHARS_PER_TOKEN = 4
+
+FEATURE_BUDGETS = {
+    "candidate": 3000,
+    "match_analysis": 3000,
+    "enhancement": 3500,
+    "linkedin": 2000,
+    "cover_letter": 3000,
+    "interview": 2500,
+    "report": 3500,
+    "jd": 1500,
+    # Total resume tokens packed into one multi-candidate scoring request
+    "candidate_batch": 16000,
+}
+# e.g. JOBFIT_TOKEN_BUDGETS='{"candidate": 2000, "jd": 1000}'
+FEATURE_BUDGETS.update(json.loads(os.getenv("JOBFIT_TOKEN_BUDGETS", "{}")))
+
+_BULLETS = re.compile(r"^[•●▪■‣⁃∙*·\-–—]+\s*")
+# "Page 2", "Page 2 of 3", "2 of 3" are page numbers wherever they sit; a bare
+# "2" or "2/3" only counts at a page edge, since elsewhere it may be content
+_PAGE_LABEL = re.compile(r"^(page\s*\d+(\s*(of|/)\s*\d+)?|\d{1,3}\s+of\s+\d{1,3})$", re.IGNORECASE)
+_BARE_PAGE_NUMBER = re.compile(r"^\d{1,3}(\s*/\s*\d{1,3})?$")
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text on Gemini
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _boilerplate_key(line):
+    return re.sub(r"\d+", "#", line.strip().lower())
+
+def _is_page_number(line, at_edge):
+    return bool(_PAGE_LABEL.match(line) or (at_edge and _BARE_PAGE_NUMBER.match(line)))
+
+def strip_page_boilerplate(text):
+    # Lines that recur near the top or bottom of most pages are headers/footers;
+    # the first page keeps its copy since that is often the candidate's name
+    pages = text.split(PAGE_BREAK)
+    if len(pages) < 2:
+        return text
+    edge_counts = Counter()
+    for page in pages:
+        # Bare numbers are left to _is_page_number, or every lone figure would match
+        lines = [l for l in page.splitlines() if l.strip() and not _BARE_PAGE_NUMBER.match(l.strip())]
+        edge_counts.update({_boilerplate_key(l) for l in lines[:3] + lines[-3:]})
+    threshold = max(2, (len(pages) + 1) // 2)
+    repeated = {key for key, n in edge_counts.items() if n >= threshold}
+    kept = []
+    for number, page in enumerate(pages):
+        lines = page.splitlines()
+        filled = [i for i, l in enumerate(lines) if l.strip()]
+        # Headers/footers are only looked for where they were detected; a bare
+        # number only counts on the page's outermost lines next to a page break
+        margin = set(filled[:3] + filled[-3:])
+        edges = set(filled[-1:] + (filled[:1] if number else []))
+        kept.append("\n".join(
+            l for i, l in enumerate(lines)
+            if not (number and i in margin and _boilerplate_key(l) in repeated)
+            and not _is_page_number(l.strip(), i in edges)
+        ))
+    return "\n".join(kept)
+
+def normalize_whitespace(text):
+    text = text.replace(PAGE_BREAK, "\n").replace("\u00a0", " ").replace("\r", "")
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)  # words hyphenated across lines
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r"[ \t]+", " ", line).strip()
+        line = _BULLETS.sub("- ", line) if _BULLETS.match(line) else line
+        lines.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+def _line_value(index, line, keywords):
+    if not line:
+        return 0.5
+    words = tokenize(line)
+    score = sum(2 for w in words if w in keywords) if keywords else 0
+    score += 1.5 if re.search(r"\d", line) else 0        # metrics, dates
+    score += 1.0 if line.startswith("- ") else 0          # achievement bullets
+    if len(line) < 40 and (line.isupper() or line.endswith(":")):
+        score += 5                                         # section headings
+    if index < 5:
+        score += 5                                         # name, title, contact
+    return score + min(len(words), 20) / 20
+
+def trim_to_budget(text, budget_tokens, keywords=None):
+    # Drops the lowest-value lines (keeping order) until the text fits
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+    lines = text.splitlines()
+    ranked = sorted(range(len(lines)), key=lambda i: _line_value(i, lines[i], keywords))
+    keep = set(range(len(lines)))
+    excess = len(text) - budget_tokens * CHARS_PER_TOKEN
+    for i in ranked:
+        if excess <= 0:
+            break
+        keep.discard(i)
+        excess -= len(lines[i]) + 1
+    trimmed = "\n".join(lines[i] for i in sorted(keep))
+    return trimmed[: budget_tokens * CHARS_PER_TOKEN]
+
+def compact(text, budget_tokens=None, keywords=None):
+    text = normalize_whitespace(strip_page_boilerplate(text or ""))
+    return trim_to_budget(text, budget_tokens, keywords) if budget_tokens else text
+
+def compact_jd(job_desc):
+    return compact(job_desc, FEATURE_BUDGETS["jd"]) if job_desc else job_desc
+
+def compact_resume(feature, resume_text, jd_keywords=None):
+    # Keeps only the resume sections the feature reads, within its budget
+    resume = slice_for(feature, strip_page_boilerplate(resume_text or ""))
+    return compact(resume, FEATURE_BUDGETS.get(feature), jd_keywords)
+
+def compact_inputs(feature, resume_text, job_desc=None, stats=None):
+    # Returns (resume, jd) compacted for the feature's budget. If stats is
+    # given it receives token counts before and after.
+    jd = compact_jd(job_desc)
+    resume = compact_resume(feature, resume_text, set(tokenize(jd)) if jd else None)
+    if stats is not None:
+        stats.update(
+            resume_tokens_before=estimate_tokens(resume_text),
+            resume_tokens=estimate_tokens(resume),
+            jd_tokens_before=estimate_tokens(job_desc),
+            jd_tokens=estimate_tokens(jd),
+        )
+    return resume, jd
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Modules read JOBFIT_CACHE_DIR at import time; tests never touch the real cache
+os.environ["JOBFIT_CACHE_DIR"] = tempfile.mkdtemp(prefix="jobfit-tests-")
@@ -0,0 +1,89 @@
+import os
+import re
+import zlib
+
+import numpy as np
+
+# Near-duplicate detection for uploaded resumes. Each text becomes a MinHash
+# signature over word shingles; an LSH index (signatures cut into bands)
+# proposes candidate pairs, which are confirmed by the estimated Jaccard
+# similarity and merged into clusters. Each cluster is analyzed once.
+DEFAULT_THRESHOLD = float(os.getenv("JOBFIT_DEDUPE_THRESHOLD", 0.85))
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+_PRIME = (1 << 31) - 1
+
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+def shingles(text, size=SHINGLE_SIZE):
+    words = re.findall(r"\w+", (text or "").lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash(text):
+    # uint64 signature of NUM_PERM minimum hashes
+    hashed = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles(text)), dtype=np.uint64)
+    if not hashed.size:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    hashed %= np.uint64(_PRIME)
+    return ((np.outer(hashed, _A) + _B) % np.uint64(_PRIME)).min(axis=0)
+
+def similarity(sig_a, sig_b):
+    # Estimated Jaccard similarity of the two shingle sets
+    return float(np.mean(sig_a == sig_b))
+
+def _bands_for(threshold, num_perm=NUM_PERM):
+    # Picks bands x rows whose S-curve midpoint (1/b)^(1/r) is closest to the threshold
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+class LSHIndex:
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM):
+        self.threshold = threshold
+        self.bands, self.rows = _bands_for(threshold, num_perm)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = {}
+
+    def _keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def query(self, signature):
+        # Keys already indexed whose similarity to signature reaches the threshold
+        seen = set()
+        for band, key in self._keys(signature):
+            seen.update(self._buckets[band].get(key, ()))
+        return [k for k in seen if similarity(signature, self._signatures[k]) >= self.threshold]
+
+    def add(self, key, signature):
+        self._signatures[key] = signature
+        for band, bucket_key in self._keys(signature):
+            self._buckets[band].setdefault(bucket_key, []).append(key)
+
+def cluster(texts, threshold=DEFAULT_THRESHOLD):
+    # Returns clusters of indices into texts, in upload order; the first
+    # index of each cluster is its representative
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    index = LSHIndex(threshold)
+    for i, text in enumerate(texts):
+        signature = minhash(text)
+        for j in index.query(signature):
+            a, b = find(i), find(j)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+        index.add(i, signature)
+
+    groups = {}
+    for i in range(len(texts)):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(groups.values(), key=lambda g: g[0])
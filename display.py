@@ -1,4 +1,5 @@
 import streamlit as st
+from metrics import timed_function
 
 def setup_style():
     st.markdown("""
@@ -95,6 +96,7 @@ def setup_style():
         </style>
     """, unsafe_allow_html=True)
 
+@timed_function("render analysis")
 def display_analysis(analysis):
     if not analysis: return
 
@@ -144,6 +146,7 @@ def display_analysis(analysis):
         for s in analysis['categories']['technical_skills']['missing_skills']:
             st.markdown(f'<span class="skill-tag skill-no">✕ {s}</span>', unsafe_allow_html=True)
 
+@timed_function("render enhancement")
 def display_enhancement(data):
     if not data: return
     
@@ -158,6 +161,7 @@ def display_enhancement(data):
         with col2:
             st.markdown(f'<div class="compare-box good"><b>✅ IMPROVED:</b><br>{s}</div>', unsafe_allow_html=True)
 
+@timed_function("render linkedin")
 def display_linkedin(data):
     if not data: return
     st.subheader("✨ Headlines")
@@ -166,9 +170,12 @@ def display_linkedin(data):
     st.subheader("📝 About Section")
     st.code(data['about_section'], language='text')
 
+@timed_function("render interview")
 def display_interview(data):
     if not data: return
-    st.info(f"💡 **Pro Tip:** {data['preparation_tips'][0]}")
+    # A schema-valid reply may still carry an empty list
+    if data.get('preparation_tips'):
+        st.info(f"💡 **Pro Tip:** {data['preparation_tips'][0]}")
     
     c1, c2 = st.columns(2)
     with c1:
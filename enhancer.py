@@ -1,6 +1,20 @@
-from utils import clean_and_parse_json
+from compaction import compact_inputs
+from llm import generate_structured
+from schemas import ENHANCEMENT_SCHEMA
+from sections import weakest_bullets
 
 def get_resume_enhancement(model, resume_text, job_desc):
+    # The weakest bullets are picked locally from the segmented resume, so the
+    # model rewrites real lines instead of hunting for them
+    weak = weakest_bullets(resume_text)
+    resume_text, job_desc = compact_inputs("enhancement", resume_text, job_desc)
+    if weak:
+        targets = "\n".join(f"{i}. {b['text']}" for i, b in enumerate(weak, start=1))
+        weak_hint = "Copy the bullets listed under BULLETS TO REWRITE verbatim, in this order."
+        targets = f"BULLETS TO REWRITE:\n{targets}\n"
+    else:
+        weak_hint = "Find the 3 weakest, shortest, or most vague bullet points in the resume."
+        targets = ""
     prompt = f"""
     Act as an Expert Resume Writer for Senior Roles. 
     Analyze the resume against the Job Description (JD).
@@ -15,7 +29,7 @@ def get_resume_enhancement(model, resume_text, job_desc):
         }},
         "bullet_points": {{ 
             "weak_bullets": [
-                "Find the 3 weakest, shortest, or most vague bullet points in the resume."
+                "{weak_hint}"
             ], 
             "improved_versions": [
                 "Rewrite each weak bullet into a detailed, heavy-hitting paragraph (2-3 sentences long). MUST use the STAR method (Situation, Task, Action, Result). MUST include specific numbers, percentages, tools used, and business impact. Make it sound like a senior-level achievement."
@@ -26,9 +40,12 @@ def get_resume_enhancement(model, resume_text, job_desc):
         }}
     }}
     
+    {targets}
     JD: {job_desc}
     Resume: {resume_text}
     """
     
-    response = model.generate_content(prompt)
-    return clean_and_parse_json(response.text)
\ No newline at end of file
+    data = generate_structured(model, prompt, ENHANCEMENT_SCHEMA)
+    if data and weak:
+        data["bullet_points"]["weak_bullets"] = [b["text"] for b in weak]
+    return data
\ No newline at end of file
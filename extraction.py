@@ -0,0 +1,167 @@
+import importlib.machinery
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import metrics
+from utils import PAGE_BREAK, cache_text, cached_text, file_fingerprint, read_pdf_bytes
+
+# Batch PDF text extraction on a process pool. PyPDF2 is pure Python and
+# CPU-bound, so threads would just queue behind the GIL. Files are spread
+# across worker processes, and long documents are further split into page
+# ranges so one bloated portfolio does not stall the batch. Workers get a
+# file path and a page range, never the PDF bytes; uploads are spilled to a
+# temporary file once.
+MAX_PAGES = int(os.getenv("JOBFIT_MAX_PAGES", 40))
+MAX_BYTES = int(os.getenv("JOBFIT_MAX_PDF_BYTES", 15 * 1024 * 1024))
+FILE_TIMEOUT_SECONDS = float(os.getenv("JOBFIT_EXTRACT_TIMEOUT", 30))
+PAGES_PER_TASK = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    # One long-lived pool per process. Workers are spawned, not forked:
+    # Streamlit's process is multithreaded, and a fork copies whatever locks
+    # other threads held at that moment.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 2,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+def _submit(pool, *args):
+    # Under Streamlit, __main__ is the app script without a __spec__, and a
+    # spawned worker would re-run it. A spec named "__main__" makes
+    # multiprocessing skip that step (workers start on demand, so this is
+    # checked on every submit).
+    main = sys.modules.get("__main__")
+    if main is not None and getattr(main, "__spec__", None) is None:
+        main.__spec__ = importlib.machinery.ModuleSpec("__main__", None)
+    return pool.submit(_extract_pages, *args)
+
+def _spill(scratch, index, data):
+    path = os.path.join(scratch, f"{index}.pdf")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+def _extract_pages(path, start, stop):
+    # Runs in a worker process. Returns (page texts, total page count, cpu seconds)
+    import PyPDF2
+
+    started = time.process_time()
+    reader = PyPDF2.PdfReader(path)
+    total = len(reader.pages)
+    texts = [reader.pages[i].extract_text() or "" for i in range(start, min(stop, total))]
+    return texts, total, time.process_time() - started
+
+def _empty_result(name):
+    return {
+        "name": name, "fingerprint": None, "text": None, "pages": 0, "pages_read": 0, "truncated": False,
+        "cached": False, "seconds": 0.0, "cpu_seconds": 0.0, "error": None,
+    }
+
+def extract_many(files, max_pages=MAX_PAGES, max_bytes=MAX_BYTES, timeout=FILE_TIMEOUT_SECONDS):
+    # files: uploaded files, paths or bytes. Returns one result dict per file,
+    # in input order, with the text (or an error) and per-file timings.
+    # Texts land in the shared utils cache, so the other tabs reuse them.
+    # Uploads are spilled to a scratch directory removed once all are done.
+    with tempfile.TemporaryDirectory(prefix="jobfit-extract-") as scratch:
+        return _extract_many(files, scratch, max_pages, max_bytes, timeout)
+
+def _extract_many(files, scratch, max_pages, max_bytes, timeout):
+    results, pending = [], {}
+    pool = _get_pool()
+    started = time.perf_counter()
+
+    for index, source in enumerate(files):
+        result = _empty_result(getattr(source, "name", source if isinstance(source, str) else f"file-{index}"))
+        results.append(result)
+        try:
+            data = read_pdf_bytes(source)
+        except Exception as e:
+            result["error"] = f"unreadable: {e}"
+            continue
+        if len(data) > max_bytes:
+            result["error"] = f"file is {len(data) / 1e6:.1f} MB, over the {max_bytes / 1e6:.1f} MB limit"
+            continue
+        key = result["fingerprint"] = file_fingerprint(data)
+        text = cached_text(key)
+        if text is not None:
+            result.update(text=text, cached=True)
+            continue
+        path = source if isinstance(source, str) else _spill(scratch, index, data)
+        # The first range also tells us the page count; the rest is fanned out below
+        first = _submit(pool, path, 0, min(PAGES_PER_TASK, max_pages))
+        pending[first] = (index, 0)
+        result.update(_path=path, _key=key, _chunks={}, _waiting=1, _started=time.perf_counter())
+
+    while pending:
+        now = time.perf_counter()
+        deadlines = [results[i]["_started"] + timeout for i, _ in pending.values()]
+        done, _ = wait(pending, timeout=max(0.0, min(deadlines) - now), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            index, start = pending.pop(future)
+            result = results[index]
+            if result["error"]:
+                continue
+            try:
+                texts, total, cpu = future.result()
+            except Exception as e:
+                result["error"] = f"extraction failed: {e}"
+                continue
+            result["_chunks"][start] = texts
+            result["_waiting"] -= 1
+            result["cpu_seconds"] += cpu
+            if start == 0:
+                result["pages"] = total
+                limit = min(total, max_pages)
+                result["truncated"] = total > max_pages
+                for chunk_start in range(PAGES_PER_TASK, limit, PAGES_PER_TASK):
+                    chunk = _submit(pool, result["_path"], chunk_start, min(chunk_start + PAGES_PER_TASK, limit))
+                    pending[chunk] = (index, chunk_start)
+                    result["_waiting"] += 1
+            if result["_waiting"] == 0:
+                pages = [page for _, chunk in sorted(result["_chunks"].items()) for page in chunk]
+                result.update(text=PAGE_BREAK.join(pages), pages_read=len(pages), seconds=time.perf_counter() - result["_started"])
+                cache_text(result["_key"], result["text"])
+                metrics.registry.observe("jobfit_pdf_extract_seconds", result["seconds"])
+
+        # Files past their deadline are reported and their remaining ranges dropped
+        now = time.perf_counter()
+        for future, (index, _) in list(pending.items()):
+            result = results[index]
+            if not result["error"] and now - result["_started"] > timeout:
+                result["error"] = f"timed out after {timeout:.0f}s"
+            if result["error"]:
+                future.cancel()
+                pending.pop(future)
+
+    metrics.record("pdf extract (pool)", time.perf_counter() - started, files=len(results))
+    for result in results:
+        if result.get("_started") and not result["seconds"]:
+            result["seconds"] = time.perf_counter() - result["_started"]
+        for key in ("_path", "_key", "_chunks", "_waiting", "_started"):
+            result.pop(key, None)
+    return results
+
+def summarize(results):
+    ok = [r for r in results if r["text"]]
+    return {
+        "files": len(results),
+        "extracted": len(ok),
+        "cached": sum(r["cached"] for r in results),
+        "failed": sum(bool(r["error"]) for r in results),
+        "pages": sum(r["pages_read"] for r in results),
+        "cpu_seconds": round(sum(r["cpu_seconds"] for r in results), 3),
+        "slowest": max(results, key=lambda r: r["seconds"])["name"] if results else None,
+    }
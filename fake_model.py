@@ -0,0 +1,100 @@
+import hashlib
+import json
+import random
+import threading
+import time
+
+# Deterministic stand-in for genai.GenerativeModel, for offline benchmarks.
+# Anything the app calls a "model" only needs this duck-typed interface:
+#
+#   model.model_name
+#   model.generate_content(prompt, generation_config=None, stream=False)
+#       -> response with .text and .usage_metadata; with stream=True an
+#          iterable of chunks (each with .text) that carries .usage_metadata
+#
+# Replies follow the response_schema in generation_config when there is
+# one, so every JSON feature gets well-formed canned output.
+
+class _Usage:
+    def __init__(self, prompt, text):
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+class _Response:
+    def __init__(self, prompt, text):
+        self.text = text
+        self.usage_metadata = _Usage(prompt, text)
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class _Stream:
+    def __init__(self, prompt, text, chunk_delay):
+        self._prompt, self._text, self._delay = prompt, text, chunk_delay
+        self.usage_metadata = _Usage(prompt, text)
+
+    def __iter__(self):
+        for i in range(0, len(self._text), 64):
+            time.sleep(self._delay)
+            yield _Chunk(self._text[i:i + 64])
+
+class FakeModelError(RuntimeError):
+    pass
+
+FREE_TEXT_REPLY = """**Professional Summary**
+Results-driven engineer with a record of shipping reliable systems.
+
+- Led a migration that cut infrastructure cost by 30%.
+- Built data pipelines processing 2M events per day.
+- Mentored four engineers through promotion.
+"""
+
+class FakeModel:
+    def __init__(self, latency=0.05, jitter=0.02, failure_rate=0.0, seed=0, model_name="models/fake-gemini"):
+        self.model_name = model_name
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self._rng.gauss(self.latency, self.jitter))
+            failed = self._rng.random() < self.failure_rate
+        return delay, failed
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        delay, failed = self._draw()
+        schema = (generation_config or {}).get("response_schema")
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        text = _render(sample(schema, random.Random(seed))) if schema else FREE_TEXT_REPLY
+        if stream:
+            time.sleep(delay / 2)
+            if failed:
+                raise FakeModelError("fake backend: 503 Service Unavailable")
+            return _Stream(prompt, text, delay / 2 / max(1, len(text) // 64))
+        time.sleep(delay)
+        if failed:
+            raise FakeModelError("fake backend: 503 Service Unavailable")
+        return _Response(prompt, text)
+
+def sample(schema, rng):
+    # A plausible instance of a (Gemini-style, upper-case) response schema
+    kind = schema["type"].upper()
+    if kind == "OBJECT":
+        return {k: sample(v, rng) for k, v in schema.get("properties", {}).items()}
+    if kind == "ARRAY":
+        return [sample(schema["items"], rng) for _ in range(3)]
+    if kind in ("NUMBER", "INTEGER"):
+        return rng.randint(35, 95)
+    if kind == "BOOLEAN":
+        return True
+    return rng.choice(["Strong Python and cloud background", "Needs Kubernetes exposure", "Quantify impact in each role"])
+
+def _render(data):
+    return "```json\n" + json.dumps(data, indent=2) + "\n```"
@@ -1,6 +1,9 @@
-from utils import clean_and_parse_json
+from compaction import compact_inputs
+from llm import generate_structured
+from schemas import INTERVIEW_SCHEMA
 
 def get_interview_tips(model, resume_text, job_desc):
+    resume_text, job_desc = compact_inputs("interview", resume_text, job_desc)
     prompt = f"""
     Generate interview prep. Return ONLY JSON:
     {{
@@ -11,5 +14,4 @@ def get_interview_tips(model, resume_text, job_desc):
     JD: {job_desc}
     Resume: {resume_text}
     """
-    response = model.generate_content(prompt)
-    return clean_and_parse_json(response.text)
\ No newline at end of file
+    return generate_structured(model, prompt, INTERVIEW_SCHEMA)
\ No newline at end of file
@@ -0,0 +1,81 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from compaction import compact
+from llm import generate_structured
+from schemas import JD_REQUIREMENTS_SCHEMA
+
+# JD preprocessing: the job description is interpreted once into a compact
+# list of structured requirements, cached by JD hash. Per-candidate prompts
+# then carry that list instead of the full JD text.
+CACHE_MAX_ENTRIES = 64
+
+_cache = OrderedDict()
+_in_flight = {}
+_lock = threading.Lock()
+
+def jd_fingerprint(job_desc):
+    normalized = re.sub(r"\s+", " ", job_desc or "").strip().lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def _extract(model, job_desc):
+    prompt = f"""
+    Act as a Technical Recruiter. Extract the structured hiring requirements from this Job Description.
+    Return ONLY valid JSON with these keys:
+    {{
+        "title": "Job title",
+        "seniority": "Junior / Mid / Senior / Lead / Principal",
+        "domain": "Industry or product domain",
+        "min_years_experience": 5,
+        "required_skills": ["Every must-have skill, tool or qualification, short noun phrases"],
+        "optional_skills": ["Nice-to-have skills"],
+        "responsibilities": ["The 3-5 core responsibilities, one short phrase each"],
+        "education": "Degree requirement, or empty if none"
+    }}
+    JD: {compact(job_desc)}
+    """
+    return generate_structured(model, prompt, JD_REQUIREMENTS_SCHEMA)
+
+def get_jd_requirements(model, job_desc):
+    # Concurrent callers for the same JD wait for one extraction instead of racing
+    key = jd_fingerprint(job_desc)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+        event = _in_flight.get(key)
+        owner = event is None
+        if owner:
+            event = _in_flight[key] = threading.Event()
+    if not owner:
+        event.wait()
+        with _lock:
+            return _cache.get(key)
+
+    requirements = None
+    try:
+        requirements = _extract(model, job_desc)
+    finally:
+        with _lock:
+            if requirements:
+                _cache[key] = requirements
+                while len(_cache) > CACHE_MAX_ENTRIES:
+                    _cache.popitem(last=False)
+            _in_flight.pop(key).set()
+    return requirements
+
+def format_requirements(requirements):
+    # Compact text form used in place of the JD inside candidate prompts
+    lines = [f"Role: {requirements['title']} ({requirements['seniority']}) · Domain: {requirements['domain']}"]
+    if requirements.get("min_years_experience"):
+        lines.append(f"Minimum experience: {requirements['min_years_experience']:g} years")
+    lines.append("Required: " + ", ".join(requirements["required_skills"]))
+    if requirements["optional_skills"]:
+        lines.append("Nice to have: " + ", ".join(requirements["optional_skills"]))
+    if requirements["responsibilities"]:
+        lines.append("Responsibilities: " + "; ".join(requirements["responsibilities"]))
+    if requirements.get("education"):
+        lines.append(f"Education: {requirements['education']}")
+    return "\n".join(lines)
@@ -0,0 +1,198 @@
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import metrics
+from batch import run_concurrently
+from llm_cache import CACHE_DIR
+
+# Batch jobs run on a background thread instead of inside the Streamlit
+# script, so reruns (tab switches, widget changes) and page reloads do not
+# throw away work already paid for. Each item's result is written to SQLite
+# as soon as it lands; a job cut off by a server restart keeps its finished
+# items and can be resumed, which also retries the items that failed.
+JOB_RETENTION_SECONDS = int(os.getenv("JOBFIT_JOB_RETENTION", 7 * 24 * 3600))
+
+def new_job_id():
+    return uuid.uuid4().hex[:12]
+
+class JobStore:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, "jobs.sqlite3")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, session TEXT, kind TEXT NOT NULL, status TEXT NOT NULL, "
+                "created REAL NOT NULL, updated REAL NOT NULL, total INTEGER NOT NULL, "
+                "done INTEGER NOT NULL DEFAULT 0, meta TEXT NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS job_items ("
+                "job_id TEXT NOT NULL, idx INTEGER NOT NULL, item TEXT NOT NULL, "
+                "status TEXT NOT NULL DEFAULT 'pending', result TEXT, finished REAL, "
+                "PRIMARY KEY (job_id, idx))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_session ON jobs (session, created)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def create(self, kind, items, meta=None, session=None, job_id=None):
+        job_id = job_id or new_job_id()
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, session, kind, status, created, updated, total, meta) VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, session, kind, now, now, len(items), json.dumps(meta or {})),
+            )
+            db.executemany(
+                "INSERT INTO job_items (job_id, idx, item) VALUES (?, ?, ?)",
+                [(job_id, idx, json.dumps(item)) for idx, item in enumerate(items)],
+            )
+        return job_id
+
+    def set_status(self, job_id, status):
+        with self._lock, self._connect() as db:
+            db.execute("UPDATE jobs SET status = ?, updated = ? WHERE id = ?", (status, time.time(), job_id))
+
+    def record(self, job_id, idx, result):
+        # A list result (one batched request) failed if any of its entries did
+        failed = result is None or (isinstance(result, list) and any(r is None for r in result))
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.execute(
+                "UPDATE job_items SET status = ?, result = ?, finished = ? WHERE job_id = ? AND idx = ?",
+                ("failed" if failed else "done", json.dumps(result), now, job_id, idx),
+            )
+            db.execute("UPDATE jobs SET done = done + 1, updated = ? WHERE id = ?", (now, job_id))
+
+    def get(self, job_id):
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT id, kind, status, created, updated, total, done, "
+                "(SELECT COUNT(*) FROM job_items WHERE job_id = jobs.id AND status = 'failed'), meta "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "kind", "status", "created", "updated", "total", "done", "failed")
+        return {**dict(zip(keys, row)), "meta": json.loads(row[8])}
+
+    def reopen_failed(self, job_id):
+        # Failed items (errors, deadline cut-offs) go back to pending for a retry
+        with self._lock, self._connect() as db:
+            reopened = db.execute(
+                "UPDATE job_items SET status = 'pending', result = NULL, finished = NULL "
+                "WHERE job_id = ? AND status = 'failed'", (job_id,)
+            ).rowcount
+            db.execute("UPDATE jobs SET done = done - ?, updated = ? WHERE id = ?", (reopened, time.time(), job_id))
+        return reopened
+
+    def pending(self, job_id):
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT idx, item FROM job_items WHERE job_id = ? AND status = 'pending' ORDER BY idx", (job_id,)
+            ).fetchall()
+        return [(idx, json.loads(item)) for idx, item in rows]
+
+    def mark_interrupted(self):
+        # Nothing survives a process restart; jobs left "running" were cut off
+        with self._lock, self._connect() as db:
+            db.execute("UPDATE jobs SET status = 'interrupted' WHERE status IN ('queued', 'running')")
+
+    def prune(self, max_age=JOB_RETENTION_SECONDS):
+        cutoff = time.time() - max_age
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM job_items WHERE job_id IN (SELECT id FROM jobs WHERE updated < ?)", (cutoff,))
+            db.execute("DELETE FROM jobs WHERE updated < ?", (cutoff,))
+
+class JobRunner:
+    def __init__(self, store=None):
+        self.store = store or JobStore()
+        self.store.mark_interrupted()
+        self.store.prune()
+        self._lock = threading.Lock()
+        self._threads = {}
+        self._cancel = {}
+
+    def submit(self, kind, items, worker, max_workers, meta=None, session=None, job_id=None):
+        # worker(item) -> JSON-serializable result or None; returns the job id.
+        # Pass a job_id from new_job_id() when the worker needs to know it.
+        job_id = self.store.create(kind, items, meta, session, job_id)
+        self._start(job_id, list(enumerate(items)), worker, max_workers)
+        return job_id
+
+    def resume(self, job_id, worker, max_workers):
+        # Runs the items never reached plus the ones that failed
+        if self.is_running(job_id):
+            return False
+        self.store.reopen_failed(job_id)
+        pending = self.store.pending(job_id)
+        if not pending:
+            self.store.set_status(job_id, "done")
+            return False
+        self._start(job_id, pending, worker, max_workers)
+        return True
+
+    def is_running(self, job_id):
+        with self._lock:
+            return job_id in self._threads
+
+    def cancel(self, job_id):
+        with self._lock:
+            event = self._cancel.get(job_id)
+        if event:
+            event.set()
+
+    def _start(self, job_id, pending, worker, max_workers):
+        cancel = threading.Event()
+        # The job keeps the submitter's context (session tag for the rate limiter)
+        thread = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(self._run, job_id, pending, worker, max_workers, cancel),
+            name=f"jobfit-job-{job_id}",
+            daemon=True,
+        )
+        with self._lock:
+            self._threads[job_id] = thread
+            self._cancel[job_id] = cancel
+        self.store.set_status(job_id, "running")
+        thread.start()
+
+    def _run(self, job_id, pending, worker, max_workers, cancel):
+        # Own run log: the script run that submitted the job has long moved on
+        metrics.start_run()
+        status = "done"
+        try:
+            for (idx, _), result in run_concurrently(pending, lambda entry: worker(entry[1]), max_workers):
+                self.store.record(job_id, idx, result)
+                if cancel.is_set():
+                    status = "cancelled"
+                    break
+        except Exception:
+            status = "failed"
+        finally:
+            self.store.set_status(job_id, status)
+            metrics.registry.inc("jobfit_jobs_total", status=status)
+            with self._lock:
+                self._threads.pop(job_id, None)
+                self._cancel.pop(job_id, None)
+
+metrics.registry.describe("jobfit_jobs_total", "Background batch jobs by final status")
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def get_runner():
+    # One runner per process, shared by every session
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
@@ -1,6 +1,9 @@
-from utils import clean_and_parse_json
+from compaction import compact_inputs
+from llm import generate_structured
+from schemas import LINKEDIN_SCHEMA
 
 def get_linkedin_optimization(model, resume_text):
+    resume_text, _ = compact_inputs("linkedin", resume_text)
     prompt = f"""
     Analyze resume for LinkedIn. Return ONLY JSON:
     {{
@@ -11,5 +14,4 @@ def get_linkedin_optimization(model, resume_text):
     }}
     Resume: {resume_text}
     """
-    response = model.generate_content(prompt)
-    return clean_and_parse_json(response.text)
\ No newline at end of file
+    return generate_structured(model, prompt, LINKEDIN_SCHEMA)
\ No newline at end of file
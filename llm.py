@@ -0,0 +1,370 @@
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+import ratelimit
+import schemas
+from compaction import estimate_tokens
+from llm_cache import ResponseCache, cache_key
+from utils import IncrementalJSONParser, clean_and_parse_json, is_complete_json
+
+# Every Gemini call in the app goes through this module so that caching
+# (and anything else that wraps a call) lives in one place.
+response_cache = ResponseCache()
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+def load_model(name=DEFAULT_MODEL):
+    # For scripts outside the Streamlit app; reads GOOGLE_API_KEY from .env
+    import google.generativeai as genai
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise RuntimeError("GOOGLE_API_KEY is not set. Please check your .env file.")
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(name)
+
+# Tail latency controls. Every non-streaming call runs under a per-call
+# timeout (the model tier's, else CALL_TIMEOUT_SECONDS), shortened to
+# whatever is left of the caller's deadline (set with `deadline()`,
+# inherited by batch workers through contextvars). The clock starts only
+# once the call holds its rate-limiter token and tier slot, so time spent
+# queued is never billed as a timeout; queueing still stops at the deadline. With hedging on, a call
+# to a tiered model (model_registry) that outlives the tier's observed p95
+# gets one duplicate request and whichever answers first wins. The Gemini
+# SDK cannot abort a request in flight: a loser that has not reached the API
+# yet is skipped, one already sent is abandoned and its reply ignored.
+CALL_TIMEOUT_SECONDS = float(os.getenv("JOBFIT_CALL_TIMEOUT", 90))
+HEDGE_PERCENTILE = 95
+
+DeadlineExceeded = ratelimit.DeadlineExceeded
+
+_deadline = contextvars.ContextVar("jobfit_deadline", default=None)
+_hedging = contextvars.ContextVar("jobfit_hedging", default=os.getenv("JOBFIT_HEDGE", "0") == "1")
+_call_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="jobfit-gemini")
+
+@contextlib.contextmanager
+def deadline(seconds):
+    # Nested deadlines keep the earlier one
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(current, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def time_left():
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+def set_hedging(enabled):
+    _hedging.set(bool(enabled))
+
+def _call_timeout(model):
+    cap = getattr(model, "timeout", None) or CALL_TIMEOUT_SECONDS
+    left = time_left()
+    if left is None:
+        return cap, False
+    if left <= 0:
+        raise DeadlineExceeded("deadline passed before the Gemini call started")
+    return min(cap, left), left <= cap
+
+def _acquire_slot(slot):
+    # Waiting for a tier slot counts against the deadline, not the call timeout
+    left = time_left()
+    if not slot.acquire(timeout=max(0.0, left) if left is not None else None):
+        raise DeadlineExceeded("deadline passed while waiting for a model slot")
+
+@contextlib.contextmanager
+def _tier_slot(model):
+    # Holds the model's tier slot (model_registry.TieredModel) for the duration
+    slot = getattr(model, "slot", None)
+    if slot is None:
+        yield
+        return
+    _acquire_slot(slot)
+    try:
+        yield
+    finally:
+        slot.release()
+
+class _NotSent(TimeoutError):
+    pass
+
+def _submit(fn, cancelled, release=None):
+    def run():
+        if cancelled.is_set():
+            raise _NotSent("abandoned before it was sent")
+        return fn()
+    future = _call_pool.submit(run)
+    if release:
+        # A slot stays taken until its request really finishes
+        future.add_done_callback(lambda _: release())
+    return future
+
+def _usage_tokens(response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0
+    return (getattr(usage, "prompt_token_count", 0) or 0) + (getattr(usage, "candidates_token_count", 0) or 0)
+
+def _settle_hedge(limiter, charged):
+    # The hedge's limiter charge is settled once it finishes: refunded if it
+    # never reached the API, else corrected to what it actually used
+    def settle(future):
+        if future.cancelled():
+            actual = 0
+        elif future.exception() is not None:
+            actual = 0 if isinstance(future.exception(), _NotSent) else charged
+        else:
+            actual = _usage_tokens(future.result()) or charged
+        limiter.settle(charged, actual)
+    return settle
+
+def _run_with_deadline(model, fn, tokens):
+    # The caller already holds a limiter token; the primary request takes the
+    # tier slot here, before the timeout clock starts
+    slot = getattr(model, "slot", None)
+    if slot is not None:
+        _acquire_slot(slot)
+    try:
+        timeout, deadline_bound = _call_timeout(model)
+    except DeadlineExceeded:
+        if slot is not None:
+            slot.release()
+        raise
+    cancelled = threading.Event()
+    started = time.monotonic()
+    futures = [_submit(fn, cancelled, slot.release if slot is not None else None)]
+    percentile = getattr(model, "latency_percentile", None)
+    hedge_after = percentile(HEDGE_PERCENTILE) if percentile and _hedging.get() else None
+    hedged = False
+    hedge = None
+    error = None
+    try:
+        while futures:
+            elapsed = time.monotonic() - started
+            if elapsed >= timeout:
+                break
+            wait_for = timeout - elapsed
+            if hedge_after is not None and not hedged:
+                wait_for = min(wait_for, max(0.0, hedge_after - elapsed))
+            done, _ = wait(futures, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.remove(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if hedge is not None:
+                    metrics.registry.inc("jobfit_llm_hedges_total", outcome="won" if future is hedge else "lost")
+                return result
+            # Hedge once, only if a tier slot and limiter capacity are free right now
+            if not done and hedge_after is not None and not hedged and futures:
+                hedged = True
+                limiter = ratelimit.default_limiter
+                if slot.acquire(blocking=False):
+                    charged = limiter.try_acquire(tokens)
+                    if charged:
+                        hedge = _submit(fn, cancelled, slot.release)
+                        hedge.add_done_callback(_settle_hedge(limiter, charged))
+                        futures.append(hedge)
+                        metrics.registry.inc("jobfit_llm_hedges_total", outcome="sent")
+                    else:
+                        slot.release()
+        if error is not None and not futures:
+            raise error
+        raise (DeadlineExceeded if deadline_bound else TimeoutError)(f"Gemini call timed out after {timeout:.1f}s")
+    finally:
+        cancelled.set()
+        for future in futures:
+            future.cancel()
+
+def model_name(model):
+    return getattr(model, "model_name", type(model).__name__)
+
+def _cached_reply(model, key):
+    with metrics.timed("response cache"):
+        cached = response_cache.get(key)
+    if cached is not None:
+        metrics.record_llm_usage(model_name(model), cached=True)
+    return cached
+
+def _call_model(model, prompt, generation_config=None, key=None):
+    # The single place a non-streaming request reaches Gemini. Requests pass
+    # the shared rate limiter; identical in-flight requests (same key) share one call.
+    name = model_name(model)
+    prompt_tokens = estimate_tokens(prompt)
+    metrics.registry.observe("jobfit_prompt_tokens", prompt_tokens, model=name.split("/")[-1])
+
+    budget = prompt_tokens + ratelimit.OUTPUT_TOKEN_ALLOWANCE
+
+    def send():
+        if generation_config:
+            return model.generate_content(prompt, generation_config=generation_config)
+        return model.generate_content(prompt)
+
+    def attempt():
+        with metrics.timed("gemini") as info:
+            try:
+                response = _run_with_deadline(model, send, budget)
+                text = response.text
+            except Exception:
+                metrics.record_llm_usage(name, failed=True)
+                raise
+            usage = metrics.record_llm_usage(name, response)
+            info.update(usage)
+        return text, usage.get("tokens_in", 0) + usage.get("tokens_out", 0)
+
+    def call():
+        return ratelimit.call_with_backoff(attempt, budget, time_left=time_left)
+
+    if key is None:
+        return call()
+    return ratelimit.single_flight.do(key, call, timeout=time_left())
+
+def generate_text(model, prompt, generation_config=None, use_cache=True, cache_if=None):
+    # cache_if lets callers refuse to cache replies they could not use
+    key = cache_key(model_name(model), prompt, generation_config)
+    if use_cache:
+        cached = _cached_reply(model, key)
+        if cached is not None:
+            return cached
+
+    text = _call_model(model, prompt, generation_config, key=key if use_cache else None)
+
+    if use_cache and (cache_if is None or cache_if(text)):
+        response_cache.put(key, text)
+    return text
+
+def stream_text(model, prompt, generation_config=None, use_cache=True, stats=None, cache_if=None):
+    # Yields the reply chunk by chunk as Gemini produces it. If a stats dict
+    # is passed it receives "ttft" (time to first token) and "total" seconds.
+    stats = stats if stats is not None else {}
+    started = time.perf_counter()
+    key = cache_key(model_name(model), prompt, generation_config)
+    if use_cache:
+        cached = _cached_reply(model, key)
+        if cached is not None:
+            stats["ttft"] = stats["total"] = time.perf_counter() - started
+            stats["cached"] = True
+            yield cached
+            return
+
+    # Streams are not hedged, but do not start once the deadline has passed
+    _call_timeout(model)
+    kwargs = {"stream": True}
+    if generation_config:
+        kwargs["generation_config"] = generation_config
+    name = model_name(model)
+    prompt_tokens = estimate_tokens(prompt)
+    metrics.registry.observe("jobfit_prompt_tokens", prompt_tokens, model=name.split("/")[-1])
+
+    def start():
+        try:
+            with _tier_slot(model):
+                return model.generate_content(prompt, **kwargs), 0
+        except Exception:
+            metrics.record_llm_usage(name, failed=True)
+            raise
+
+    # Streams are not coalesced (each caller renders its own), but they do
+    # share the rate limiter; the token charge is settled once usage is known
+    budget = prompt_tokens + ratelimit.OUTPUT_TOKEN_ALLOWANCE
+    response = ratelimit.call_with_backoff(start, budget, time_left=time_left)
+    parts = []
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. safety metadata) carry nothing to render
+            continue
+        if not text:
+            continue
+        if not parts:
+            stats["ttft"] = time.perf_counter() - started
+        parts.append(text)
+        yield text
+    stats["total"] = time.perf_counter() - started
+    usage = metrics.record_llm_usage(name, response)
+    if usage:
+        ratelimit.default_limiter.settle(budget, usage["tokens_in"] + usage["tokens_out"])
+    metrics.record("gemini (stream)", stats["total"], **usage)
+    if "ttft" in stats:
+        metrics.registry.observe("jobfit_llm_ttft_seconds", stats["ttft"], model=name.split("/")[-1])
+
+    # Only a fully consumed stream is cached
+    full_text = "".join(parts)
+    if use_cache and full_text and (cache_if is None or cache_if(full_text)):
+        response_cache.put(key, full_text)
+
+def generate_json(model, prompt, generation_config=None, use_cache=True, on_partial=None):
+    # Repaired (e.g. truncated) replies are used but not cached. With
+    # on_partial the reply is streamed so callers can show fields early.
+    if on_partial:
+        return stream_json(model, prompt, generation_config, use_cache, on_partial)
+    text = generate_text(model, prompt, generation_config, use_cache, cache_if=is_complete_json)
+    return clean_and_parse_json(text)
+
+def stream_json(model, prompt, generation_config=None, use_cache=True, on_partial=None):
+    # Streams a JSON reply through the incremental parser; on_partial is
+    # called with the best-effort object each time a chunk adds to it
+    parser = IncrementalJSONParser()
+    last = None
+    for chunk in stream_text(model, prompt, generation_config, use_cache, cache_if=is_complete_json):
+        data = parser.feed(chunk)
+        if on_partial and data is not None and data != last:
+            on_partial(data)
+            last = data
+    data = parser.result()
+    return data if isinstance(data, (dict, list)) else None
+
+
+# Older google-generativeai releases reject response_schema client-side;
+# after the first rejection we fall back to JSON mime type + local validation
+_native_schema_supported = True
+
+def _generate_with_schema(model, prompt, schema, use_cache, on_partial=None):
+    global _native_schema_supported
+    if _native_schema_supported:
+        try:
+            return generate_json(model, prompt, schemas.generation_config(schema), use_cache, on_partial)
+        except (TypeError, ValueError, KeyError) as e:
+            if "response_schema" not in str(e):
+                raise
+            _native_schema_supported = False
+    return generate_json(model, prompt, schemas.generation_config(schema, native_schema=False), use_cache, on_partial)
+
+def generate_structured(model, prompt, schema, max_repairs=1, use_cache=True, allow_partial=False, on_partial=None):
+    # Requests native JSON output for the schema and validates the reply.
+    # Missing or invalid fields are fetched with a short repair request
+    # instead of regenerating the whole report. Returns None if the reply
+    # is still invalid, unless allow_partial is set. on_partial streams the
+    # first reply and receives its fields as they complete.
+    data = _generate_with_schema(model, prompt, schema, use_cache, on_partial)
+    data = schemas.coerce(data if isinstance(data, dict) else {}, schema)
+    problems = schemas.validate(data, schema)
+
+    for _ in range(max_repairs):
+        if not problems:
+            break
+        sub = schemas.subschema(schema, problems)
+        patch = _generate_with_schema(model, schemas.repair_prompt(prompt, data, problems), sub, use_cache)
+        if isinstance(patch, dict):
+            data = schemas.merge(data, schemas.coerce(patch, sub), sub)
+        problems = schemas.validate(data, schema)
+
+    if not problems or (allow_partial and data):
+        return data
+    return None
+
+
+metrics.registry.describe("jobfit_llm_hedges_total", "Hedged Gemini requests: sent, won (hedge answered first), lost")
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Gemini replies are cached on disk, keyed by model name, a hash of the
+# whitespace-normalized prompt and the generation config. Entries expire
+# after a TTL and the least recently used ones are evicted past max_entries.
+CACHE_DIR = os.getenv("JOBFIT_CACHE_DIR", ".jobfit_cache")
+DEFAULT_TTL_SECONDS = int(os.getenv("JOBFIT_CACHE_TTL", 7 * 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.getenv("JOBFIT_CACHE_MAX_ENTRIES", 5000))
+
+def _sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def normalize_prompt(prompt):
+    return re.sub(r"\s+", " ", prompt).strip()
+
+def cache_key(model_name, prompt, generation_config=None):
+    payload = json.dumps(
+        {"model": model_name, "prompt": _sha256(normalize_prompt(prompt)), "config": generation_config or {}},
+        sort_keys=True,
+        default=str,
+    )
+    return _sha256(payload)
+
+class ResponseCache:
+    def __init__(self, path=None, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or os.path.join(CACHE_DIR, "responses.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._connect() as db:
+            row = db.execute("SELECT text, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl:
+                db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+            if row:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, text, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, text, now, now),
+            )
+            db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            # Keep only the max_entries most recently used replies
+            db.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY accessed DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM responses")
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        with self._connect() as db:
+            size = db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": size}
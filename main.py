@@ -1,10 +1,17 @@
 import streamlit as st
-import google.generativeai as genai
 import os
-import json
-import pandas as pd
-from PyPDF2 import PdfReader
+import re
 from dotenv import load_dotenv
+import time
+import uuid
+import metrics
+import ratelimit
+from utils import extract_text_from_pdf
+from llm import deadline, generate_text, set_hedging, stream_text, response_cache
+from compaction import compact_inputs
+from batch import DEFAULT_WORKERS, MAX_WORKERS
+# Batch/report-only modules (NumPy scoring, process pool, renderers) are
+# imported inside the button handlers that use them, keeping cold start lean
 
 # 1. CONFIGURATION
 load_dotenv()
@@ -15,209 +22,93 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Per-run timing/token log shown in the sidebar; optional Prometheus endpoint
+metrics.start_run()
+metrics.serve()
+
+# Gemini quota is shared process-wide; tagging calls with the session lets
+# the rate limiter queue sessions fairly (batch workers inherit the tag)
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+ratelimit.set_session(st.session_state.session_id)
+
 # 2. API SETUP
 api_key = os.getenv("GOOGLE_API_KEY")
 if not api_key:
     st.error("❌ API Key missing. Please check your .env file.")
     st.stop()
 
-try:
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-flash')
-except Exception as e:
-    st.error(f"❌ Connection Error: {e}")
-    st.stop()
+@st.cache_resource(show_spinner=False)
+def load_models():
+    # Built once per process. Tier models are created on first use, so
+    # google.generativeai is not imported at cold start
+    from model_registry import ModelRegistry
+    return ModelRegistry()
+
+def workers_for(feature, requested):
+    # Never more parallel workers than the feature's tier has slots
+    registry = load_models()
+    return max(1, min(int(requested), registry.concurrency(registry.tier_for(feature))))
+
+def get_model(feature="chat"):
+    # Each feature/stage is routed to a model tier (jobfit_models.json overrides the defaults)
+    try:
+        return load_models().model_for(feature)
+    except Exception as e:
+        st.error(f"❌ Connection Error: {e}")
+        st.stop()
 
 # 3. SUPERLIST DESIGN (Dark & Red Aesthetic)
-st.markdown("""
-    <style>
-    /* IMPORT FONT */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;800&display=swap');
-
-    /* GLOBAL COLORS */
-    .stApp {
-        background-color: #0E0E10; /* Deep Charcoal */
-    }
-    
-    html, body, [class*="css"] {
-        font-family: 'Inter', sans-serif;
-        color: #E0E0E0;
-    }
-
-    /* SIDEBAR */
-    [data-testid="stSidebar"] {
-        background-color: #18181B; 
-        border-right: 1px solid #27272A;
-    }
-
-    /* ACCENT COLOR (Superlist Red) */
-    a { color: #FF5B45 !important; }
-    
-    /* BUTTONS */
-    .stButton > button {
-        background-color: #FF5B45 !important;
-        color: white !important;
-        border-radius: 50px;
-        border: none;
-        padding: 0.6rem 2.5rem;
-        font-weight: 600;
-        letter-spacing: 0.5px;
-        transition: all 0.2s ease;
-    }
-    .stButton > button:hover {
-        opacity: 0.9;
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(255, 91, 69, 0.3);
-    }
-
-    /* HEADERS */
-    h1, h2, h3 {
-        font-weight: 800 !important;
-        letter-spacing: -0.5px;
-        color: #FFFFFF !important;
-    }
-    
-    /* SCORE CARD */
-    .score-container {
-        background-color: #18181B;
-        border: 1px solid #333;
-        border-radius: 20px;
-        padding: 40px;
-        text-align: center;
-        margin-bottom: 30px;
-        box-shadow: 0 10px 30px rgba(0,0,0,0.3);
-    }
-    .score-title {
-        color: #888;
-        font-size: 1rem;
-        text-transform: uppercase;
-        letter-spacing: 2px;
-        margin-bottom: 10px;
-    }
-    .score-value {
-        color: #FF5B45; 
-        font-size: 6rem;
-        font-weight: 900;
-        line-height: 1;
-        margin-bottom: 10px;
-    }
-    .score-sub {
-        color: #FFF;
-        font-size: 1.5rem;
-        font-weight: 600;
-    }
-
-    /* ANALYSIS CARDS */
-    .analysis-card {
-        background-color: #1E1E20;
-        border-radius: 16px;
-        padding: 25px;
-        border: 1px solid #2D2D30;
-        margin-bottom: 20px;
-    }
-    .card-header {
-        color: #FF5B45;
-        font-weight: 700;
-        font-size: 1.2rem;
-        margin-bottom: 15px;
-        display: flex;
-        align-items: center;
-        gap: 10px;
-    }
-    
-    /* SKILL TAGS */
-    .skill-tag {
-        display: inline-block;
-        background-color: #2D1A1A;
-        color: #FF8B7D;
-        padding: 5px 12px;
-        border-radius: 6px;
-        font-size: 0.9rem;
-        margin: 0 5px 5px 0;
-        border: 1px solid #4A2B2B;
-    }
-    
-    /* RECOMMENDATION BOX */
-    .rec-box {
-        background-color: #18181B;
-        border-left: 4px solid #FF5B45;
-        padding: 20px;
-        margin-bottom: 15px;
-        border-radius: 0 12px 12px 0;
-    }
-    .rec-title {
-        color: #FF5B45;
-        font-weight: 700;
-        font-size: 1.1rem;
-        margin-bottom: 5px;
-    }
-    .rec-body {
-        color: #CCCCCC;
-        font-size: 0.95rem;
-        line-height: 1.6;
-    }
-
-    /* INPUTS */
-    .stTextInput input, .stTextArea textarea, .stSelectbox div[data-baseweb="select"] {
-        background-color: #18181B !important;
-        color: white !important;
-        border: 1px solid #27272A !important;
-        border-radius: 8px;
-    }
-    
-    /* HIDE MENU */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    </style>
-""", unsafe_allow_html=True)
+@st.cache_resource(show_spinner=False)
+def load_css():
+    # Read and minified once per process; only the small result is re-sent each rerun
+    with open(os.path.join(os.path.dirname(__file__), "static", "style.css"), encoding="utf-8") as f:
+        css = f.read()
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", re.sub(r"\s+", " ", css))
+    return f"<style>{css.strip()}</style>"
+
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # 4. LOGIC FUNCTIONS
 def extract_text(uploaded_file):
+    # Cached by file content in utils, so each upload is parsed once per session
     try:
-        reader = PdfReader(uploaded_file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-        return text
+        with metrics.timed("pdf extract"):
+            return extract_text_from_pdf(uploaded_file)
     except: return None
 
 def ask_ai(prompt):
     try:
-        return model.generate_content(prompt).text
+        return generate_text(get_model(), prompt)
     except Exception as e:
         return f"Error: {e}"
 
-def analyze_single_resume(text, job_desc):
-    prompt = f"""
-    Act as a Senior Career Strategist. Perform a deep-dive analysis of this resume against the JD.
-    RESUME: {text}
-    JD: {job_desc}
-
-    Return a valid JSON object with these exact keys:
-    {{
-        "match_score": 85, 
-        "match_level": "High / Medium / Low",
-        "executive_summary": "A detailed 4-5 sentence paragraph analyzing the fit. Be specific about years of experience, domain knowledge, and major red flags.",
-        "strengths": ["List 3-4 major strengths found in the resume"],
-        "missing_skills": ["List 4-5 specific technical or soft skills MISSING from the resume that are in the JD"],
-        "recommendations": [
-            {{
-                "title": "Recommendation 1 Title",
-                "description": "A comprehensive 3-sentence paragraph explaining exactly HOW to fix this and WHY it matters."
-            }},
-            {{
-                "title": "Recommendation 2 Title",
-                "description": "Detailed advice..."
-            }}
-        ]
-    }}
-    """
-    response_text = ask_ai(prompt)
+def stream_ai(prompt, status="Thinking...", feature="chat"):
+    # Renders the reply as chunks arrive, then reports time-to-first-token
+    placeholder = st.empty()
+    placeholder.caption(f"⏳ {status}")
+    stats = {}
+    parts = []
     try:
-        cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
-        return json.loads(cleaned_text)
+        for chunk in stream_text(get_model(feature), prompt, stats=stats):
+            parts.append(chunk)
+            placeholder.markdown("".join(parts) + "▌")
+    except Exception as e:
+        parts.append(f"\n\nError: {e}")
+    placeholder.markdown("".join(parts))
+    if "ttft" in stats:
+        source = "cache" if stats.get("cached") else "Gemini"
+        st.caption(f"First token in {stats['ttft']:.2f}s · complete in {stats['total']:.2f}s ({source})")
+
+def analyze_single_resume(text, job_desc, requirements=None, model=None):
+    from analysis import get_candidate_score
+    # Schema-validated; a candidate is only dropped when not even the score survived
+    try:
+        data = get_candidate_score(model or get_model("candidate"), text, job_desc, requirements)
     except:
         return None
+    return data if data and isinstance(data.get('match_score'), (int, float)) else None
 
 # 5. SIDEBAR
 with st.sidebar:
@@ -229,9 +120,25 @@ with st.sidebar:
     st.markdown("### 2. Job Description")
     job_desc = st.text_area("Paste text here", height=250, label_visibility="collapsed", placeholder="Paste JD here...")
     
+    st.markdown("### 3. Batch Settings")
+    # More workers than the routed tier's concurrency would only queue behind its slots
+    batch_workers_max = max(workers_for(f, MAX_WORKERS) for f in ("candidate", "triage"))
+    concurrency = st.slider("Parallel requests", 1, batch_workers_max, min(DEFAULT_WORKERS, batch_workers_max), help="How many resumes are sent to Gemini at the same time. Capped by the model tier's concurrency (see Model routing).")
+    top_k = st.number_input("Deep-analyze top K (0 = all)", min_value=0, value=0, step=1, help="Resumes are ranked locally first; only the best K get a full Gemini analysis.")
+    min_local_score = st.slider("Minimum local score", 0, 100, 0, help="Resumes below this keyword-match score are not sent to Gemini.")
+    dedupe_threshold = st.slider("Duplicate similarity", 0.5, 1.0, float(os.getenv("JOBFIT_DEDUPE_THRESHOLD", 0.85)), 0.01, help="Uploads at least this similar (MinHash estimate of shared text) are grouped and analyzed once.")
+    batch_deadline = st.number_input("Batch deadline (minutes, 0 = none)", min_value=0, value=0, step=1, help="Resumes still waiting on Gemini when the deadline passes are cut off instead of holding up the leaderboard.")
+    hedge_requests = st.checkbox("Hedge slow requests", value=False, help="If a call runs past the model's usual (p95) latency, send a duplicate and keep whichever answers first.")
+    set_hedging(hedge_requests)
+    batched_scoring = st.checkbox("Score several resumes per request", value=False, help="Packs compacted resumes into shared requests against the JD. Cheaper on large batches; failed entries are retried one by one.")
+    
     st.markdown("---")
     st.caption(f"Files Uploaded: {len(uploaded_files) if uploaded_files else 0}")
     st.caption("Powered by Gemini 2.5")
+    with st.expander("Model routing"):
+        st.table(load_models().describe())
+    cache_stats = response_cache.stats()
+    st.caption(f"Response cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses · {cache_stats['entries']} stored")
 
 # 6. MAIN CONTENT
 st.title("Get things done with your career.")
@@ -239,68 +146,256 @@ st.markdown("Batch processing enabled: Analyze multiple candidates at once.")
 st.markdown("<br>", unsafe_allow_html=True)
 
 # 7. FEATURES
-t1, t2, t3, t4, t5 = st.tabs([
+t1, t2, t3, t4, t5, t6, t7, t8 = st.tabs([
     "📊 Batch Analysis", 
     "✨ Resume Enhancer", 
     "🔗 LinkedIn Optimizer", 
     "✍️ Cover Letter", 
-    "🎤 Interview"
+    "🎤 Interview",
+    "📦 Full Report",
+    "🧮 Role Matrix",
+    "🗂️ Talent Pool"
 ])
 
+# HELPER: Adds extracted uploads to the persistent talent pool (new ones only),
+# only when the user asks to
+def add_to_talent_pool(extracted):
+    from vector_index import get_index
+    try:
+        with metrics.timed("talent pool index"):
+            return get_index().add_many([(r['name'], r['text'], r['fingerprint']) for r in extracted if r['text']])
+    except Exception:
+        return 0
+
+# HELPER: Worker for background batch jobs. The model is resolved on the
+# script thread; job threads have no Streamlit context of their own.
+# Each analysis also goes to the results store the leaderboard reads from.
+def batch_worker(job_id, job_desc, requirements, model, deadline_at=None):
+    from jd_profile import jd_fingerprint
+    jd_hash = jd_fingerprint(job_desc)
+    def save(item, data):
+        if not (data and isinstance(data.get('match_score'), (int, float))):
+            return None
+        data['filename'] = item['filename']
+        data['local_score'] = item['local_score']
+        data['duplicates'] = item.get('duplicates', [])
+        results_store.put(job_id, item['id'], jd_hash, data)
+        return data
+    def process(item):
+        # Calls inherit whatever is left of the batch deadline (wall clock, set at submit)
+        if deadline_at is None:
+            return analyze(item)
+        with deadline(deadline_at - time.time()):
+            return analyze(item)
+    def analyze(item):
+        if 'batch' in item:
+            # Several resumes scored in one request; failures are retried one by one inside
+            from analysis import get_candidate_scores
+            try:
+                scored = get_candidate_scores(model, [c['text'] for c in item['batch']], job_desc, requirements)
+            except:
+                return None
+            return [save(c, data) for c, data in zip(item['batch'], scored)]
+        return save(item, analyze_single_resume(item['text'], job_desc, requirements, model))
+    return process
+
+LEADERBOARD_PAGE_SIZE = 25
+
+def cluster_label(res):
+    dups = res.get('duplicates') or []
+    return f" · +{len(dups)} duplicate{'s' if len(dups) > 1 else ''}" if dups else ""
+
+def render_candidate(res):
+    with st.expander(f"📄 {res['filename']}{cluster_label(res)} — Score: {res['match_score']}% (local {res.get('local_score') or 0:.0f})"):
+        if res.get('duplicates'):
+            st.caption("Same or near-identical resume also uploaded as: " + ", ".join(res['duplicates']))
+        st.markdown(f"**Executive Summary:** {res.get('executive_summary', 'Not provided.')}")
+    
+        c1, c2 = st.columns(2)
+        with c1:
+            st.write("✅ **Strengths:**")
+            for s in res.get('strengths', []): st.markdown(f"- {s}")
+        with c2:
+            st.write("⚠️ **Missing Skills:**")
+            for s in res.get('missing_skills', []): st.markdown(f"- {s}")
+    
+        st.markdown("---")
+        st.write("💡 **Recommendations:**")
+        for rec in res.get('recommendations', []):
+            st.info(f"**{rec.get('title', 'Recommendation')}:** {rec.get('description', '')}")
+
+# Reads one page of stored analyses at a time; sorting and filtering happen
+# in SQLite, so browsing never calls Gemini and each page costs the same
+def render_leaderboard(job_id, screened):
+    with metrics.timed("render leaderboard"):
+        top = results_store.page(job_id, limit=1)
+        if top:
+            # 1. SHOW TOP CANDIDATE
+            top = top[0]
+            st.markdown(f"""
+                <div class="score-container">
+                    <div class="score-title">🏆 Top Candidate: {top['filename']}</div>
+                    <div class="score-value">{top['match_score']}%</div>
+                    <div class="score-sub">{top.get('match_level', 'Unrated')} Match</div>
+                </div>
+            """, unsafe_allow_html=True)
+
+            # 2. FILTERS, SORT & ONE PAGE OF DETAILS
+            f1, f2, f3 = st.columns([2, 2, 3])
+            with f1:
+                score_range = st.slider("Score range", 0, 100, (0, 100), key="lb_range")
+            with f2:
+                sort_label = st.selectbox("Sort by", ["Score ↓", "Score ↑", "Local score ↓", "Filename"], key="lb_sort")
+            with f3:
+                gaps = [skill for skill, _ in results_store.missing_skills(job_id)]
+                required = st.multiselect("Hide candidates missing", gaps, key="lb_missing")
+            sort, descending = {"Score ↓": ("score", True), "Score ↑": ("score", False),
+                                "Local score ↓": ("local", True), "Filename": ("filename", False)}[sort_label]
+            filters = {"min_score": score_range[0], "max_score": score_range[1], "exclude_missing": required}
+
+            total = results_store.count(job_id, **filters)
+            pages = max(1, -(-total // LEADERBOARD_PAGE_SIZE))
+            if st.session_state.get("lb_page", 1) > pages:
+                st.session_state.lb_page = 1
+            page = st.number_input(f"Page (of {pages}) · {total} candidates", 1, pages, 1, key="lb_page") if pages > 1 else 1
+            offset = (page - 1) * LEADERBOARD_PAGE_SIZE
+            for res in results_store.page(job_id, offset, LEADERBOARD_PAGE_SIZE, sort, descending, **filters):
+                render_candidate(res)
+        elif not screened:
+            st.error("Could not analyze resumes. Please check files.")
+
+        # 3. RESUMES THAT ONLY RECEIVED A LOCAL SCORE
+        if screened:
+            st.markdown("---")
+            st.subheader(f"Screened by local score ({len(screened)})")
+            st.caption("Keyword/TF-IDF match against the JD. Not sent to Gemini.")
+            for res in screened:
+                st.markdown(f"- **{res['filename']}**{cluster_label(res)} — Local score: {res['local_score']:.0f}")
+
+# Polls the running job every 2s without rerunning the rest of the page;
+# a full rerun once it finishes renders the final leaderboard
+@st.fragment(run_every=2)
+def batch_progress(job_id):
+    job = job_runner.store.get(job_id)
+    if not job_runner.is_running(job_id):
+        st.rerun()
+    total = max(job['total'], 1)
+    unit = "batches" if job['meta'].get('batched') else "resumes"
+    st.progress(job['done'] / total, text=f"Analyzed {job['done']}/{job['total']} {unit} · runs in the background, safe to switch tabs or reload")
+    st.markdown("\n".join(
+        f"{rank}. **{r['filename']}** — {r['match_score']}%"
+        for rank, r in enumerate(results_store.page(job_id, limit=10), start=1)
+    ))
+    if st.button("Stop batch", key="btn1_cancel"):
+        job_runner.cancel(job_id)
+
 # --- TAB 1: BATCH ANALYSIS ---
+from jobs import get_runner, new_job_id
+from results_store import get_store
+job_runner = get_runner()
+results_store = get_store()
+
 with t1:
     st.header("Candidate Leaderboard")
+    save_to_pool = st.checkbox(
+        "Add these resumes to the Talent Pool", value=False, key="pool_opt_in",
+        help="Stores each file name and a search vector on this server. You can remove them in the Talent Pool tab.",
+    )
     
     if st.button("Analyze All Resumes", key="btn1"):
         if uploaded_files and job_desc:
-            results = []
-            progress_bar = st.progress(0)
-            
-            for i, file in enumerate(uploaded_files):
-                text = extract_text(file)
-                if text:
-                    data = analyze_single_resume(text, job_desc)
-                    if data:
-                        data['filename'] = file.name
-                        results.append(data)
-                progress_bar.progress((i + 1) / len(uploaded_files))
-            
-            # Sort results by score (Highest first)
-            results.sort(key=lambda x: x['match_score'], reverse=True)
-            
-            if results:
-                # 1. SHOW TOP CANDIDATE
-                top = results[0]
-                st.markdown(f"""
-                    <div class="score-container">
-                        <div class="score-title">🏆 Top Candidate: {top['filename']}</div>
-                        <div class="score-value">{top['match_score']}%</div>
-                        <div class="score-sub">{top['match_level']} Match</div>
-                    </div>
-                """, unsafe_allow_html=True)
-
-                # 2. SHOW LEADERBOARD & DETAILS
-                for res in results:
-                    with st.expander(f"📄 {res['filename']} — Score: {res['match_score']}%"):
-                        st.markdown(f"**Executive Summary:** {res['executive_summary']}")
-                        
-                        c1, c2 = st.columns(2)
-                        with c1:
-                            st.write("✅ **Strengths:**")
-                            for s in res['strengths']: st.markdown(f"- {s}")
-                        with c2:
-                            st.write("⚠️ **Missing Skills:**")
-                            for s in res['missing_skills']: st.markdown(f"- {s}")
-                        
-                        st.markdown("---")
-                        st.write("💡 **Recommendations:**")
-                        for rec in res['recommendations']:
-                            st.info(f"**{rec['title']}:** {rec['description']}")
-            else:
-                st.error("Could not analyze resumes. Please check files.")
+            from extraction import extract_many, summarize as summarize_extraction
+            from prescore import score_resumes, select_for_deep_analysis
+            from jd_profile import format_requirements, get_jd_requirements, jd_fingerprint
+            from dedupe import cluster
+
+            # Extract once, then rank everything locally before spending any API calls
+            extracted = extract_many(uploaded_files)
+            candidates = [(file, r['text']) for file, r in zip(uploaded_files, extracted) if r['text']]
+            if save_to_pool:
+                add_to_talent_pool(extracted)
+            summary = summarize_extraction(extracted)
+            with st.expander(f"📑 Extracted {summary['extracted']}/{summary['files']} PDFs · {summary['pages']} pages · {summary['cached']} cached"):
+                st.table([
+                    {"File": r['name'], "Pages": f"{r['pages_read']}/{r['pages']}", "Seconds": round(r['seconds'], 2),
+                     "Cached": "yes" if r['cached'] else "", "Note": r['error'] or ("truncated" if r['truncated'] else "")}
+                    for r in extracted
+                ])
+
+            # Exact and near-duplicate uploads are analyzed once, via their first copy
+            clusters = cluster([text for _, text in candidates], dedupe_threshold)
+            duplicates = {group[0]: [candidates[i][0].name for i in group[1:]] for group in clusters}
+            if len(clusters) < len(candidates):
+                st.caption(f"🧬 Grouped {len(candidates) - len(clusters)} duplicate uploads into their originals.")
+            candidates = [(file, text, duplicates[i]) for i, (file, text) in enumerate(candidates) if i in duplicates]
+
+            local_scores = score_resumes(job_desc, [text for _, text, _ in candidates])
+            selected = select_for_deep_analysis(local_scores, top_k, min_local_score)
+            # Each item gets an id unique within the job; filenames may repeat across uploads
+            deep = [{'id': str(n), 'filename': file.name, 'text': text, 'local_score': float(score), 'duplicates': dups}
+                    for n, ((file, text, dups), score, keep) in enumerate(zip(candidates, local_scores, selected)) if keep]
+            screened = sorted(
+                ({'filename': file.name, 'local_score': float(score), 'duplicates': dups}
+                 for (file, _, dups), score, keep in zip(candidates, local_scores, selected) if not keep),
+                key=lambda x: x['local_score'], reverse=True,
+            )
+
+            # The JD is interpreted once; every candidate prompt reuses the compact requirement list
+            requirements = None
+            if deep:
+                try:
+                    requirements = get_jd_requirements(get_model("jd_requirements"), job_desc)
+                except Exception:
+                    requirements = None
+            if requirements:
+                with st.expander(f"📋 JD requirements: {requirements['title']} ({requirements['seniority']})"):
+                    st.text(format_requirements(requirements))
+
+            # Deep analysis runs as a background job; results are stored as they land
+            items = deep
+            if batched_scoring:
+                from analysis import plan_batches
+                items = [{'batch': [deep[i] for i in batch]} for batch in plan_batches([c['text'] for c in deep])]
+            job_id = new_job_id()
+            job_runner.submit(
+                "batch", items, batch_worker(job_id, job_desc, requirements, get_model("triage" if batched_scoring else "candidate"),
+                             time.time() + batch_deadline * 60 if batch_deadline else None),
+                workers_for("triage" if batched_scoring else "candidate", concurrency),
+                meta={'job_desc': job_desc, 'jd_hash': jd_fingerprint(job_desc), 'requirements': requirements,
+                      'screened': screened, 'batched': batched_scoring, 'deadline_minutes': batch_deadline},
+                session=st.session_state.session_id, job_id=job_id,
+            )
+            st.session_state.batch_job = job_id
+            st.query_params["job"] = job_id
         else:
             st.warning("Please upload at least one resume and a job description.")
 
+    # Reattach to this session's job, or to the one in the URL after a page reload
+    job_id = st.session_state.get("batch_job") or st.query_params.get("job")
+    job = job_runner.store.get(job_id) if job_id else None
+    if job:
+        st.session_state.batch_job = job_id
+        if job_runner.is_running(job_id):
+            batch_progress(job_id)
+        else:
+            stopped = job['status'] in ("interrupted", "cancelled") and job['done'] < job['total']
+            if stopped or job['failed']:
+                unit = "batches" if job['meta'].get('batched') else "resumes"
+                if stopped:
+                    st.warning(f"Batch stopped after {job['done']}/{job['total']} {unit}.")
+                if job['failed']:
+                    st.warning(f"{job['failed']} {unit} failed or hit the deadline.")
+                if st.button("Resume batch" if stopped else "Retry failed", key="btn1_resume"):
+                    # A resumed batch gets a fresh deadline of the original length
+                    meta = job['meta']
+                    minutes = meta.get('deadline_minutes') or 0
+                    feature = "triage" if meta.get('batched') else "candidate"
+                    worker = batch_worker(job_id, meta['job_desc'], meta['requirements'], get_model(feature),
+                                          time.time() + minutes * 60 if minutes else None)
+                    job_runner.resume(job_id, worker, workers_for(feature, concurrency))
+                    st.rerun()
+            render_leaderboard(job_id, job['meta'].get('screened', []))
+
 # HELPER: Select Box with UNIQUE KEY
 def get_selected_file(key_suffix):
     if not uploaded_files:
@@ -311,6 +406,15 @@ def get_selected_file(key_suffix):
     # Find the actual file object
     return next(f for f in uploaded_files if f.name == selected_name)
 
+# HELPER: Compact resume + JD for a feature's token budget and show the saving
+def compact_for(feature, text):
+    stats = {}
+    resume, jd = compact_inputs(feature, text, job_desc, stats)
+    before = stats['resume_tokens_before'] + stats['jd_tokens_before']
+    after = stats['resume_tokens'] + stats['jd_tokens']
+    st.caption(f"Prompt input: ~{after:,} tokens (compacted from ~{before:,})")
+    return resume, jd
+
 # --- TAB 2: RESUME ENHANCER ---
 with t2:
     st.header("Resume Content Enhancer")
@@ -318,18 +422,23 @@ with t2:
     
     if st.button("Enhance Selected Resume", key="btn2"):
         if target_file and job_desc:
-            with st.spinner("Rewriting..."):
-                text = extract_text(target_file)
-                if text:
-                    prompt = f"""
-                    Act as an Expert Resume Writer.
-                    1. Identify the 3 weakest bullet points in this resume relative to the JD.
-                    2. Rewrite them into "Power Bullets" using the STAR method.
-                    3. Write a new, high-impact Professional Summary.
-                    RESUME: {text}
-                    JD: {job_desc}
-                    """
-                    st.markdown(ask_ai(prompt))
+            text = extract_text(target_file)
+            if text:
+                from sections import weakest_bullets
+                # Target real bullets picked from the segmented resume when there are any
+                weak = weakest_bullets(text)
+                text, jd = compact_for("enhancement", text)
+                step1 = ("1. Quote these bullet points from the resume: " + " | ".join(b['text'] for b in weak)) if weak else \
+                        "1. Identify the 3 weakest bullet points in this resume relative to the JD."
+                prompt = f"""
+                Act as an Expert Resume Writer.
+                {step1}
+                2. Rewrite them into "Power Bullets" using the STAR method.
+                3. Write a new, high-impact Professional Summary.
+                RESUME: {text}
+                JD: {jd}
+                """
+                stream_ai(prompt, "Rewriting...", "enhancement")
         else:
             st.warning("Upload resumes and select one.")
 
@@ -340,18 +449,18 @@ with t3:
     
     if st.button("Optimize Profile", key="btn3"):
         if target_file and job_desc:
-            with st.spinner("Optimizing..."):
-                text = extract_text(target_file)
-                if text:
-                    prompt = f"""
-                    Create a LinkedIn optimization plan.
-                    1. 3 Viral Headlines.
-                    2. About Section (150 words).
-                    3. Top Skills to pin.
-                    RESUME: {text}
-                    JD: {job_desc}
-                    """
-                    st.markdown(ask_ai(prompt))
+            text = extract_text(target_file)
+            if text:
+                text, jd = compact_for("linkedin", text)
+                prompt = f"""
+                Create a LinkedIn optimization plan.
+                1. 3 Viral Headlines.
+                2. About Section (150 words).
+                3. Top Skills to pin.
+                RESUME: {text}
+                JD: {jd}
+                """
+                stream_ai(prompt, "Optimizing...", "linkedin")
 
 # --- TAB 4: COVER LETTER ---
 with t4:
@@ -360,11 +469,11 @@ with t4:
     
     if st.button("Draft Letter", key="btn4"):
         if target_file and job_desc:
-            with st.spinner("Writing..."):
-                text = extract_text(target_file)
-                if text:
-                    prompt = f"Write a professional cover letter. RESUME: {text} JD: {job_desc}"
-                    st.markdown(ask_ai(prompt))
+            text = extract_text(target_file)
+            if text:
+                text, jd = compact_for("cover_letter", text)
+                prompt = f"Write a professional cover letter. RESUME: {text} JD: {jd}"
+                stream_ai(prompt, "Writing...", "cover_letter")
 
 # --- TAB 5: INTERVIEW PREP ---
 with t5:
@@ -373,8 +482,165 @@ with t5:
     
     if st.button("Generate Question", key="btn5"):
         if target_file and job_desc:
-            with st.spinner("Thinking..."):
+            text = extract_text(target_file)
+            if text:
+                text, jd = compact_for("interview", text)
+                prompt = f"Generate 1 very difficult interview question & STAR answer. RESUME: {text} JD: {jd}"
+                stream_ai(prompt, "Thinking...", "interview")
+
+# --- TAB 6: FULL REPORT (single fused call) ---
+with t6:
+    st.header("Full Candidate Report")
+    st.caption("Match analysis, resume upgrades, LinkedIn, interview prep and a cover letter from a single Gemini call.")
+    target_file = get_selected_file("report")
+    
+    if st.button("Generate Full Report", key="btn6"):
+        if target_file and job_desc:
+            from report import get_full_report
+            from display import display_analysis, display_enhancement, display_linkedin, display_interview
+
+            # The match score is shown as soon as it streams in, long before the cover letter
+            preview = st.empty()
+            def show_partial(data):
+                analysis = data.get('analysis') if isinstance(data, dict) else None
+                if isinstance(analysis, dict) and isinstance(analysis.get('overall_match'), (int, float)):
+                    preview.metric("Overall match", f"{analysis['overall_match']}%", help="Rest of the report is still being written")
+
+            with st.spinner("Building report..."):
                 text = extract_text(target_file)
+                report = None
                 if text:
-                    prompt = f"Generate 1 very difficult interview question & STAR answer. RESUME: {text} JD: {job_desc}"
-                    st.markdown(ask_ai(prompt))
+                    try:
+                        report = get_full_report(get_model("report"), text, job_desc, on_partial=show_partial)
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+            preview.empty()
+            if report:
+                display_analysis(report['analysis'])
+                st.markdown("---")
+                display_enhancement(report['enhancement'])
+                st.markdown("---")
+                display_linkedin(report['linkedin'])
+                st.markdown("---")
+                st.subheader("🎤 Interview Prep")
+                display_interview(report['interview'])
+                st.markdown("---")
+                st.subheader("✍️ Cover Letter")
+                st.markdown(report['cover_letter'])
+            elif text:
+                st.error("Could not build the report. Please try again.")
+        else:
+            st.warning("Upload resumes and select one.")
+
+# --- TAB 7: ROLE MATRIX (many JDs × many resumes) ---
+with t7:
+    st.header("Role Matrix")
+    st.caption("Score every uploaded resume against several open roles at once.")
+    role_count = st.number_input("Open roles", min_value=1, max_value=10, value=2, step=1, key="matrix_roles")
+    roles = []
+    for r in range(int(role_count)):
+        c1, c2 = st.columns([1, 3])
+        with c1:
+            title = st.text_input("Role name", value=f"Role {r + 1}", key=f"matrix_title_{r}")
+        with c2:
+            jd_text = st.text_area("Job description", height=120, key=f"matrix_jd_{r}", placeholder="Paste JD here...")
+        title = title.strip() or f"Role {r + 1}"
+        if any(title == t for t, _ in roles):
+            title = f"{title} ({r + 1})"  # grid columns need unique names
+        if jd_text.strip():
+            roles.append((title, jd_text))
+
+    if st.button("Build Matrix", key="btn7"):
+        if uploaded_files and roles:
+            from extraction import extract_many
+            from matrix import grid_rows, iter_scores, local_matrix, prepare_roles, select_pairs
+
+            # Each resume is extracted once and each JD is interpreted once, whatever N × M is
+            extracted = extract_many(uploaded_files)
+            names = [r['name'] for r in extracted if r['text']]
+            texts = [r['text'] for r in extracted if r['text']]
+            role_names = [title for title, _ in roles]
+            job_descs = [jd for _, jd in roles]
+
+            local_scores = local_matrix(texts, job_descs)
+            mask = select_pairs(local_scores, top_k, min_local_score)
+            with st.spinner("Reading job descriptions..."):
+                requirements = prepare_roles(get_model("jd_requirements"), job_descs, workers_for("jd_requirements", concurrency))
+
+            scores = {}
+            total = int(mask.sum())
+            progress_bar = st.progress(0)
+            live_grid = st.empty()
+            for done, (i, j, data) in enumerate(iter_scores(get_model("triage"), texts, job_descs, requirements, mask, workers_for("triage", concurrency)), start=1):
+                if data:
+                    scores[(i, j)] = data['match_score']
+                progress_bar.progress(done / total, text=f"Scored {done}/{total}: {names[i]} × {role_names[j]}")
+                live_grid.dataframe(grid_rows(names, role_names, scores, local_scores), hide_index=True, use_container_width=True)
+            if not total:
+                progress_bar.progress(1.0)
+                live_grid.dataframe(grid_rows(names, role_names, scores, local_scores), hide_index=True, use_container_width=True)
+            st.caption("Click a column header to sort. Empty cells were screened out by local score.")
+        else:
+            st.warning("Please upload resumes and paste at least one job description.")
+
+# --- TAB 8: TALENT POOL (persistent resume index) ---
+with t8:
+    st.header("Talent Pool")
+    st.caption("Resumes you add are indexed on this server (file name and a search vector, not the text). Find the closest candidates for a JD instantly, before any Gemini call.")
+    from vector_index import get_index
+    pool = get_index()
+    entries = pool.entries()
+    st.caption(f"Indexed resumes: {len(entries)}")
+
+    if st.button("Add Uploaded Resumes", key="btn8a"):
+        if uploaded_files:
+            from extraction import extract_many
+            added = add_to_talent_pool(extract_many(uploaded_files))
+            st.success(f"Added {added} new resume(s); {len(uploaded_files) - added} already indexed or unreadable.")
+        else:
+            st.warning("Please upload at least one resume.")
+
+    top_n = st.slider("Candidates to retrieve", 5, 100, 20, key="pool_top_n")
+    if st.button("Find Matches for JD", key="btn8b"):
+        if job_desc:
+            with metrics.timed("talent pool query"):
+                matches = pool.query(job_desc, top_n)
+            if matches:
+                st.dataframe(
+                    [{"Candidate": m['name'], "Similarity": round(m['similarity'] * 100, 1)} for m in matches],
+                    hide_index=True, use_container_width=True,
+                )
+            else:
+                st.info("The talent pool is empty. Analyze or add some resumes first.")
+        else:
+            st.warning("Please paste a job description in the sidebar.")
+
+    if entries:
+        with st.expander("Remove resumes from the Talent Pool"):
+            labels = {f"{e['name']} ({e['fingerprint'][:8]})": e['fingerprint'] for e in entries}
+            chosen = st.multiselect("Resumes to remove", list(labels), key="pool_remove")
+            r1, r2 = st.columns(2)
+            with r1:
+                if st.button("Remove selected", key="btn8c", disabled=not chosen):
+                    pool.remove(labels[c] for c in chosen)
+                    st.rerun()
+            with r2:
+                if st.button("Remove all", key="btn8d"):
+                    pool.clear()
+                    st.rerun()
+
+# 8. RUN METRICS (rendered last so the whole run is covered)
+with st.sidebar:
+    run_rows = metrics.run_summary()
+    timing = metrics.finish_run()
+    if timing['cold_start'] is not None:
+        st.caption(f"⚡ Cold start: {timing['cold_start']:.2f}s")
+    with st.expander(f"⏱️ This run: {timing['run']:.2f}s"):
+        if run_rows:
+            st.dataframe(run_rows, hide_index=True, use_container_width=True)
+        else:
+            st.caption("Script rerun only; no extraction or Gemini calls.")
+    try:
+        metrics.registry.write()
+    except OSError:
+        pass
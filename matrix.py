@@ -0,0 +1,60 @@
+import numpy as np
+
+from analysis import get_candidate_score
+from batch import run_concurrently
+from jd_profile import get_jd_requirements
+from prescore import score_resumes, select_for_deep_analysis
+
+# Many-JDs × many-resumes scoring. Resume text is extracted once and JD
+# requirements are extracted once per role; all (resume, role) pairs then
+# share a single worker pool.
+
+def prepare_roles(model, job_descs, max_workers):
+    # JD requirement extraction for every role, concurrently; None falls back to the full JD
+    requirements = [None] * len(job_descs)
+    indexed = list(enumerate(job_descs))
+    for (j, _), reqs in run_concurrently(indexed, lambda item: get_jd_requirements(model, item[1]), max_workers):
+        requirements[j] = reqs
+    return requirements
+
+def local_matrix(resume_texts, job_descs):
+    # M×N local scores, one vectorized pass per role
+    if not resume_texts or not job_descs:
+        return np.zeros((len(resume_texts), len(job_descs)))
+    return np.column_stack([score_resumes(jd, resume_texts) for jd in job_descs])
+
+def select_pairs(local_scores, top_k=0, min_score=0):
+    # Applies the pre-scoring cascade per role (column)
+    mask = np.zeros(local_scores.shape, dtype=bool)
+    for j in range(local_scores.shape[1]):
+        mask[:, j] = select_for_deep_analysis(local_scores[:, j], top_k, min_score)
+    return mask
+
+def iter_scores(model, resume_texts, job_descs, requirements, mask, max_workers):
+    # Yields (resume index, role index, analysis or None) as each pair finishes
+    pairs = [(i, j) for i, j in zip(*np.nonzero(mask))]
+
+    def score(pair):
+        i, j = pair
+        return get_candidate_score(model, resume_texts[i], job_descs[j], requirements[j])
+
+    for (i, j), data in run_concurrently(pairs, score, max_workers):
+        ok = bool(data) and isinstance(data.get("match_score"), (int, float))
+        yield int(i), int(j), data if ok else None
+
+def grid_rows(resume_names, role_names, scores, local_scores):
+    # Rows for a sortable candidate × role table; unscored cells stay empty
+    rows = []
+    for i, name in enumerate(resume_names):
+        row = {"Candidate": name}
+        best_role, best_score = None, None
+        for j, role in enumerate(role_names):
+            value = scores.get((i, j))
+            row[role] = value
+            if value is not None and (best_score is None or value > best_score):
+                best_role, best_score = role, value
+        row["Best role"] = best_role
+        row["Best score"] = best_score
+        row["Best local score"] = round(float(local_scores[i].max()), 1) if local_scores.size else None
+        rows.append(row)
+    return sorted(rows, key=lambda r: (r["Best score"] is not None, r["Best score"] or 0), reverse=True)
@@ -0,0 +1,207 @@
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_cache import CACHE_DIR
+
+# Hot-path instrumentation. Every stage records into a process-wide
+# registry (exported in Prometheus text format) and into the log of the
+# current run, which the sidebar shows as a per-run breakdown.
+METRICS_FILE = os.getenv("JOBFIT_METRICS_FILE", os.path.join(CACHE_DIR, "metrics.prom"))
+METRICS_PORT = int(os.getenv("JOBFIT_METRICS_PORT", 0))
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+# USD per 1M tokens (input, output), used for the spend estimate
+PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._help = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1.0, **labels):
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.setdefault(key, {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def render(self):
+        # Prometheus text exposition format
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+        lines = []
+        with self._lock:
+            for name in sorted({n for n, _ in self._counters}):
+                lines += [f"# HELP {name} {self._help.get(name, name)}", f"# TYPE {name} counter"]
+                lines += [f"{name}{fmt(l)} {v}" for (n, l), v in sorted(self._counters.items()) if n == name]
+            for name in sorted({n for n, _ in self._histograms}):
+                lines += [f"# HELP {name} {self._help.get(name, name)}", f"# TYPE {name} histogram"]
+                for (n, l), h in sorted(self._histograms.items()):
+                    if n != name:
+                        continue
+                    for bound, count in zip(BUCKETS, h["buckets"]):
+                        le = "+Inf" if bound == float("inf") else bound
+                        lines.append(f"{name}_bucket{fmt(l, [('le', le)])} {count}")
+                    lines.append(f"{name}_sum{fmt(l)} {h['sum']}")
+                    lines.append(f"{name}_count{fmt(l)} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=METRICS_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+registry = Registry()
+registry.describe("jobfit_stage_seconds", "Wall time per pipeline stage")
+registry.describe("jobfit_llm_requests_total", "Gemini requests by model and outcome")
+registry.describe("jobfit_llm_tokens_total", "Gemini tokens by model and direction")
+registry.describe("jobfit_llm_cost_usd_total", "Estimated Gemini spend in USD")
+registry.describe("jobfit_prompt_tokens", "Estimated prompt size in tokens")
+registry.describe("jobfit_json_parse_total", "Model JSON replies by parse outcome")
+registry.describe("jobfit_llm_ttft_seconds", "Time to first streamed token")
+registry.describe("jobfit_pdf_extract_seconds", "Per-file PDF extraction wall time")
+
+# This module is imported once per process, so its import time marks the
+# start of the app's cold start
+PROCESS_STARTED = time.perf_counter()
+_cold_start_reported = False
+registry.describe("jobfit_cold_start_seconds", "Process start to end of the first script run")
+registry.describe("jobfit_rerun_seconds", "Wall time of each Streamlit script run")
+
+# The run log is a context variable so worker threads started through
+# batch.run_concurrently record into the run that launched them
+_run_log = contextvars.ContextVar("jobfit_run_log", default=None)
+
+def start_run():
+    log = {"started": time.perf_counter(), "events": [], "lock": threading.Lock()}
+    _run_log.set(log)
+    return log
+
+def record(stage, seconds, **info):
+    registry.observe("jobfit_stage_seconds", seconds, stage=stage)
+    log = _run_log.get()
+    if log is not None:
+        with log["lock"]:
+            log["events"].append({"stage": stage, "seconds": seconds, **info})
+
+@contextlib.contextmanager
+def timed(stage, **info):
+    started = time.perf_counter()
+    try:
+        yield info
+    finally:
+        record(stage, time.perf_counter() - started, **info)
+
+def timed_function(stage):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_llm_usage(model_name, response=None, cached=False, failed=False):
+    short_name = model_name.split("/")[-1]
+    outcome = "error" if failed else "cached" if cached else "ok"
+    registry.inc("jobfit_llm_requests_total", model=short_name, outcome=outcome)
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    tokens_in = getattr(usage, "prompt_token_count", 0) or 0
+    tokens_out = getattr(usage, "candidates_token_count", 0) or 0
+    price_in, price_out = PRICES.get(short_name, (0.0, 0.0))
+    cost = (tokens_in * price_in + tokens_out * price_out) / 1_000_000
+    registry.inc("jobfit_llm_tokens_total", tokens_in, model=short_name, direction="input")
+    registry.inc("jobfit_llm_tokens_total", tokens_out, model=short_name, direction="output")
+    registry.inc("jobfit_llm_cost_usd_total", cost, model=short_name)
+    return {"tokens_in": tokens_in, "tokens_out": tokens_out, "cost": cost}
+
+def run_summary():
+    # Per-stage totals for the current run, slowest stage first
+    log = _run_log.get()
+    if log is None:
+        return []
+    stages = {}
+    with log["lock"]:
+        events = list(log["events"])
+    for event in events:
+        row = stages.setdefault(event["stage"], {"Stage": event["stage"], "Calls": 0, "Seconds": 0.0, "Tokens in": 0, "Tokens out": 0, "Cost ($)": 0.0})
+        row["Calls"] += 1
+        row["Seconds"] += event["seconds"]
+        row["Tokens in"] += event.get("tokens_in", 0)
+        row["Tokens out"] += event.get("tokens_out", 0)
+        row["Cost ($)"] += event.get("cost", 0.0)
+    rows = sorted(stages.values(), key=lambda r: r["Seconds"], reverse=True)
+    for row in rows:
+        row["Seconds"] = round(row["Seconds"], 3)
+        row["Cost ($)"] = round(row["Cost ($)"], 5)
+    return rows
+
+def run_elapsed():
+    log = _run_log.get()
+    return time.perf_counter() - log["started"] if log else 0.0
+
+def finish_run():
+    # Closes the current run; the first run in a process also reports cold start
+    global _cold_start_reported
+    elapsed = run_elapsed()
+    registry.observe("jobfit_rerun_seconds", elapsed)
+    cold_start = None
+    if not _cold_start_reported:
+        _cold_start_reported = True
+        cold_start = time.perf_counter() - PROCESS_STARTED
+        registry.observe("jobfit_cold_start_seconds", cold_start)
+    return {"run": elapsed, "cold_start": cold_start}
+
+_server = None
+_server_lock = threading.Lock()
+
+def serve(port=METRICS_PORT):
+    # Optional /metrics endpoint for a Prometheus scraper; started once per process
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    body = registry.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            _server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return _server
@@ -0,0 +1,166 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+from llm import DEFAULT_MODEL, load_model
+from llm_cache import CACHE_DIR
+
+# Routes each feature/stage to a model tier. Tiers name a Gemini model plus
+# their own concurrency cap and request timeout; routes map features to
+# tiers. Both can be overridden from a JSON config file, e.g.
+#   {"tiers": {"deep": {"model": "gemini-2.5-pro"}}, "routes": {"report": "deep"}}
+# Tiers whose model is not in the (cached) list_models result fall back to
+# the next tier in FALLBACK_ORDER, so a config naming an unavailable model
+# degrades instead of failing every call.
+CONFIG_PATH = os.getenv("JOBFIT_MODELS_CONFIG", "jobfit_models.json")
+MODELS_CACHE_PATH = os.path.join(CACHE_DIR, "models.json")
+MODELS_CACHE_TTL = int(os.getenv("JOBFIT_MODELS_CACHE_TTL", 24 * 3600))
+
+DEFAULT_TIERS = {
+    "lite": {"model": "gemini-2.5-flash-lite", "concurrency": 8, "timeout": 30},
+    "standard": {"model": DEFAULT_MODEL, "concurrency": 4, "timeout": 90},
+    "deep": {"model": "gemini-2.5-pro", "concurrency": 2, "timeout": 180},
+}
+FALLBACK_ORDER = ("standard", "lite", "deep")
+
+DEFAULT_ROUTES = {
+    "triage": "lite",            # multi-candidate leaderboard scoring, role matrix
+    "jd_requirements": "lite",
+    "candidate": "standard",     # per-resume leaderboard analysis
+    "match_analysis": "standard",
+    "enhancement": "standard",
+    "linkedin": "standard",
+    "cover_letter": "standard",
+    "interview": "standard",
+    "report": "standard",        # full-report deep dive; route to "deep" for the strongest model
+    "chat": "standard",
+}
+LATENCY_WINDOW = 200
+
+def fetch_available_models():
+    # Calls list_models and caches the generateContent-capable names on disk
+    import google.generativeai as genai
+
+    names = sorted(
+        m.name.split("/")[-1] for m in genai.list_models()
+        if "generateContent" in m.supported_generation_methods
+    )
+    os.makedirs(os.path.dirname(MODELS_CACHE_PATH) or ".", exist_ok=True)
+    with open(MODELS_CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump({"fetched": time.time(), "models": names}, f)
+    return names
+
+def cached_available_models(max_age=MODELS_CACHE_TTL):
+    # None when there is no fresh cache; routing then trusts the config as is
+    try:
+        with open(MODELS_CACHE_PATH, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - cached.get("fetched", 0) > max_age:
+        return None
+    return set(cached.get("models", []))
+
+def load_config(path=CONFIG_PATH):
+    tiers = copy.deepcopy(DEFAULT_TIERS)
+    routes = dict(DEFAULT_ROUTES)
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        for name, tier in config.get("tiers", {}).items():
+            tiers.setdefault(name, dict(DEFAULT_TIERS["standard"])).update(tier)
+        routes.update(config.get("routes", {}))
+    return tiers, routes
+
+class TieredModel:
+    # Wraps a GenerativeModel with its tier's timeout and latency window.
+    # llm.py takes `slot` (the tier's concurrency cap) around each request,
+    # caps each call at `timeout` and reads `latency_percentile` to decide
+    # when to hedge.
+    def __init__(self, model, tier, registry):
+        self._model = model
+        self.tier = tier
+        self.model_name = getattr(model, "model_name", type(model).__name__)
+        self.slot = registry.slot(tier)
+        self.timeout = registry.tiers[tier].get("timeout")
+        self._registry = registry
+
+    def latency_percentile(self, pct):
+        return self._registry.latency_percentile(self.tier, pct)
+
+    def generate_content(self, prompt, **kwargs):
+        if self.timeout:
+            kwargs.setdefault("request_options", {"timeout": self.timeout})
+        started = time.perf_counter()
+        response = self._model.generate_content(prompt, **kwargs)
+        if not kwargs.get("stream"):
+            # Streams return before the reply is generated; only full calls feed the window
+            self._registry.record_latency(self.tier, time.perf_counter() - started)
+        return response
+
+class ModelRegistry:
+    def __init__(self, config_path=CONFIG_PATH, available=None, loader=load_model):
+        self.tiers, self.routes = load_config(config_path)
+        self.available = available if available is not None else cached_available_models()
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._models = {}
+        self._slots = {name: threading.BoundedSemaphore(max(1, int(t.get("concurrency", 4)))) for name, t in self.tiers.items()}
+        self._latencies = {name: deque(maxlen=LATENCY_WINDOW) for name in self.tiers}
+
+    def _usable(self, tier):
+        return tier in self.tiers and (self.available is None or self.tiers[tier]["model"] in self.available)
+
+    def tier_for(self, feature):
+        tier = self.routes.get(feature, "standard")
+        if self._usable(tier):
+            return tier
+        return next((t for t in FALLBACK_ORDER if self._usable(t)), "standard")
+
+    def model_for(self, feature):
+        tier = self.tier_for(feature)
+        with self._lock:
+            if tier not in self._models:
+                self._models[tier] = TieredModel(self._loader(self.tiers[tier]["model"]), tier, self)
+            return self._models[tier]
+
+    def pin(self, model_name):
+        # Serves every tier with one model (batch_cli --model), keeping each
+        # tier's slots, timeout and latency window
+        with self._lock:
+            for tier in self.tiers.values():
+                tier["model"] = model_name
+            self.available = None
+            self._models.clear()
+
+    def slot(self, tier):
+        return self._slots[tier]
+
+    def concurrency(self, tier):
+        return int(self.tiers[tier].get("concurrency", 4))
+
+    def record_latency(self, tier, seconds):
+        metrics.registry.observe("jobfit_tier_latency_seconds", seconds, tier=tier)
+        with self._lock:
+            self._latencies[tier].append(seconds)
+
+    def latency_percentile(self, tier, pct):
+        # Over the last LATENCY_WINDOW calls; None until there are enough samples
+        with self._lock:
+            samples = sorted(self._latencies.get(tier, ()))
+        if len(samples) < 20:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def describe(self):
+        # One row per route, for check_models.py and the sidebar
+        return [
+            {"Feature": feature, "Tier": self.tier_for(feature), "Model": self.tiers[self.tier_for(feature)]["model"]}
+            for feature in sorted(self.routes)
+        ]
+
+metrics.registry.describe("jobfit_tier_latency_seconds", "Gemini call latency by model tier")
@@ -0,0 +1,84 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+# Cheap local JD-vs-resume scoring used to triage large batches before any
+# Gemini call. Scores blend TF-IDF cosine similarity with coverage of the
+# JD's most distinctive keywords and land on the same 0-100 scale as the
+# LLM match score.
+KEYWORD_COUNT = 40
+COSINE_WEIGHT = 0.4
+COVERAGE_WEIGHT = 0.6
+
+STOPWORDS = set("""
+a about above after all also an and any are as at be been being both but by can could did do does
+doing during each etc for from had has have having he her here hers him his how i if in into is it
+its just may me more most must my no nor not of off on once only or other our ours out over own per
+same she should so some such than that the their theirs them then there these they this those
+through to too under until up very via was we were what when where which while who whom why will
+with within without would you your yours able ability across experience work working years year
+role team strong including using use well new job candidate candidates responsibilities requirements
+preferred required plus
+""".split())
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+def score_resumes(job_desc, resume_texts):
+    # Returns a float array of 0-100 scores aligned with resume_texts
+    if not resume_texts:
+        return np.zeros(0)
+    jd_counts = Counter(tokenize(job_desc))
+    doc_counts = [Counter(tokenize(text)) for text in resume_texts]
+
+    vocab = {}
+    for counts in [jd_counts, *doc_counts]:
+        for term in counts:
+            vocab.setdefault(term, len(vocab))
+
+    # Resumes as a sparse COO matrix: one (row, col, count) triple per term
+    rows = np.fromiter((i for i, c in enumerate(doc_counts) for _ in c), dtype=np.int64)
+    cols = np.fromiter((vocab[t] for c in doc_counts for t in c), dtype=np.int64)
+    counts = np.fromiter((n for c in doc_counts for n in c.values()), dtype=np.float64)
+    n_docs, n_terms = len(resume_texts), len(vocab)
+
+    df = np.bincount(cols, minlength=n_terms)
+    idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+    weights = (1.0 + np.log(counts)) * idf[cols]
+    doc_norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_docs))
+
+    jd_vec = np.zeros(n_terms)
+    if jd_counts:
+        jd_cols = np.fromiter((vocab[t] for t in jd_counts), dtype=np.int64)
+        jd_tf = np.fromiter(jd_counts.values(), dtype=np.float64)
+        jd_vec[jd_cols] = (1.0 + np.log(jd_tf)) * idf[jd_cols]
+    jd_norm = np.linalg.norm(jd_vec)
+    if jd_norm == 0:
+        return np.zeros(n_docs)
+
+    dots = np.bincount(rows, weights=weights * jd_vec[cols], minlength=n_docs)
+    cosine = dots / np.maximum(doc_norms * jd_norm, 1e-12)
+
+    # Keyword coverage: share of the JD's top-weighted terms the resume mentions
+    keyword_vec = np.zeros(n_terms)
+    top = np.argsort(jd_vec)[::-1][:KEYWORD_COUNT]
+    top = top[jd_vec[top] > 0]
+    keyword_vec[top] = jd_vec[top]
+    coverage = np.bincount(rows, weights=keyword_vec[cols], minlength=n_docs) / keyword_vec.sum()
+
+    return np.round(100 * (COSINE_WEIGHT * cosine + COVERAGE_WEIGHT * coverage), 1)
+
+def select_for_deep_analysis(scores, top_k=None, min_score=0):
+    # Boolean mask of resumes that earn a full Gemini analysis: those
+    # ranked within top_k (all when top_k is falsy) that also reach min_score
+    scores = np.asarray(scores, dtype=np.float64)
+    selected = scores >= min_score
+    if top_k and top_k < len(scores):
+        ranked = np.argsort(-scores, kind="stable")
+        in_top = np.zeros(len(scores), dtype=bool)
+        in_top[ranked[:top_k]] = True
+        selected &= in_top
+    return selected
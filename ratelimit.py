@@ -0,0 +1,219 @@
+import contextvars
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+
+import metrics
+
+# Process-wide protection for the Gemini quota, shared by every Streamlit
+# session and worker thread:
+# - a token bucket on requests/min and tokens/min, served round-robin
+#   across sessions so one big batch cannot starve other recruiters;
+# - single-flight coalescing, so identical in-flight prompts share a call;
+# - exponential backoff on 429 / quota errors, which also pauses the bucket.
+REQUESTS_PER_MINUTE = int(os.getenv("JOBFIT_GEMINI_RPM", 60))
+TOKENS_PER_MINUTE = int(os.getenv("JOBFIT_GEMINI_TPM", 1_000_000))
+OUTPUT_TOKEN_ALLOWANCE = 1000   # charged up front, settled against usage_metadata
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 60.0
+
+_session = contextvars.ContextVar("jobfit_session", default="default")
+
+def set_session(session_id):
+    _session.set(session_id or "default")
+
+def current_session():
+    return _session.get()
+
+class DeadlineExceeded(TimeoutError):
+    # The caller's deadline (llm.deadline) ran out before the call could finish
+    pass
+
+class RateLimiter:
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._cond = threading.Condition()
+        self._queues = {}        # session -> deque of waiting tickets
+        self._order = deque()    # sessions with waiters, in round-robin order
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _wait_time(self, now, tokens):
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        need_requests = max(0.0, 1 - self._requests) * 60 / self.rpm
+        need_tokens = max(0.0, tokens - self._tokens) * 60 / self.tpm
+        return max(need_requests, need_tokens, 0.01)
+
+    def acquire(self, tokens, session=None, timeout=None):
+        # Blocks until this session's turn comes up and the bucket has room.
+        # With a timeout, gives up its place in the queue (and charges
+        # nothing) once the time runs out.
+        session = session or current_session()
+        tokens = min(tokens, self.tpm)
+        ticket = object()
+        started = time.monotonic()
+        give_up = None if timeout is None else started + timeout
+        with self._cond:
+            self._queues.setdefault(session, deque()).append(ticket)
+            if session not in self._order:
+                self._order.append(session)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if give_up is not None and now >= give_up:
+                    self._leave(session, ticket)
+                    metrics.registry.observe("jobfit_ratelimit_wait_seconds", now - started)
+                    raise DeadlineExceeded("deadline passed while waiting for the rate limiter")
+                my_turn = self._order[0] == session and self._queues[session][0] is ticket
+                if my_turn and now >= self._blocked_until and self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    self._queues[session].popleft()
+                    self._order.popleft()
+                    if self._queues[session]:
+                        self._order.append(session)
+                    else:
+                        del self._queues[session]
+                    self._cond.notify_all()
+                    break
+                wait_for = self._wait_time(now, tokens) if my_turn else 0.25
+                self._cond.wait(wait_for if give_up is None else min(wait_for, give_up - now))
+        metrics.registry.observe("jobfit_ratelimit_wait_seconds", time.monotonic() - started)
+        return tokens
+
+    def _leave(self, session, ticket):
+        # Called with the lock held
+        queue = self._queues[session]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[session]
+            self._order.remove(session)
+        self._cond.notify_all()
+
+    def try_acquire(self, tokens):
+        # Non-blocking: takes capacity only if it is free now and nobody is queued
+        tokens = min(tokens, self.tpm)
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            if self._order or now < self._blocked_until or self._requests < 1 or self._tokens < tokens:
+                return 0
+            self._requests -= 1
+            self._tokens -= tokens
+            return tokens
+
+    def settle(self, charged, actual):
+        # Corrects the up-front estimate once real token usage is known
+        with self._cond:
+            self._tokens = min(self.tpm, self._tokens + charged - actual)
+
+    def pause(self, seconds):
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+class SingleFlight:
+    # Concurrent calls with the same key wait for the first one's result
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, timeout=None):
+        # A follower waits at most `timeout` seconds for the leader's result
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"event": threading.Event(), "result": None, "error": None}
+        if not leader:
+            metrics.registry.inc("jobfit_llm_coalesced_total")
+            if not call["event"].wait(None if timeout is None else max(0.0, timeout)):
+                raise DeadlineExceeded("deadline passed while waiting for an identical in-flight call")
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["event"].set()
+
+def is_quota_error(error):
+    if type(error).__name__ in ("ResourceExhausted", "TooManyRequests"):
+        return True
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "rate limit" in message
+
+def retry_delay(error, attempt):
+    # Honors a server-suggested delay ("retry in 12.3s", "retry_delay { seconds: 12 }")
+    match = re.search(r"retry (?:in|after) ([\d.]+)\s*s|seconds:\s*(\d+)", str(error), re.IGNORECASE)
+    if match:
+        return min(BACKOFF_MAX_SECONDS, float(match.group(1) or match.group(2)))
+    return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt) * random.uniform(0.8, 1.2)
+
+def call_with_backoff(fn, tokens, limiter=None, time_left=None):
+    # Runs fn under the limiter, retrying quota errors with backoff.
+    # fn returns (result, actual_tokens) so the bucket can be settled.
+    # time_left (e.g. llm.time_left) bounds the wait for the limiter.
+    limiter = limiter or default_limiter
+    for attempt in range(MAX_RETRIES + 1):
+        left = time_left() if time_left else None
+        if left is not None and left <= 0:
+            raise DeadlineExceeded("deadline passed before the Gemini call started")
+        charged = limiter.acquire(tokens, timeout=left)
+        try:
+            result, actual = fn()
+        except Exception as e:
+            if not is_quota_error(e) or attempt == MAX_RETRIES:
+                raise
+            delay = retry_delay(e, attempt)
+            metrics.registry.inc("jobfit_llm_retries_total", reason="quota")
+            limiter.pause(delay)
+            continue
+        if actual:
+            limiter.settle(charged, actual)
+        return result
+
+class UnlimitedLimiter:
+    # Same interface, no limits; for offline harnesses running against fake models
+    def acquire(self, tokens, session=None, timeout=None):
+        return tokens
+
+    def try_acquire(self, tokens):
+        return tokens
+
+    def settle(self, charged, actual):
+        pass
+
+    def pause(self, seconds):
+        pass
+
+default_limiter = RateLimiter()
+
+def set_default_limiter(limiter):
+    # Swaps the process-wide limiter (llm.py reads it at call time)
+    global default_limiter
+    default_limiter = limiter
+single_flight = SingleFlight()
+
+metrics.registry.describe("jobfit_ratelimit_wait_seconds", "Time spent waiting for the shared Gemini rate limiter")
+metrics.registry.describe("jobfit_llm_coalesced_total", "Calls that shared an identical in-flight request")
+metrics.registry.describe("jobfit_llm_retries_total", "Gemini retries by reason")
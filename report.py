@@ -0,0 +1,39 @@
+from compaction import compact_inputs
+from llm import generate_structured
+from schemas import REPORT_SCHEMA
+from sections import weakest_bullets
+
+# One call for the whole candidate workup. The resume and JD are sent once
+# instead of five times, and each section matches the shape the separate
+# feature modules return, so the display.py renderers work unchanged.
+def get_full_report(model, resume_text, job_desc, on_partial=None):
+    weak = weakest_bullets(resume_text)
+    resume_text, job_desc = compact_inputs("report", resume_text, job_desc)
+    if weak:
+        weak_hint = "quotes these resume bullets verbatim, in order: " + " | ".join(b["text"] for b in weak)
+    else:
+        weak_hint = "quotes the 3 weakest resume bullets verbatim"
+    prompt = f"""
+    Act as a Senior Career Strategist and Expert Resume Writer. Produce a complete candidate report
+    for the resume against the Job Description (JD). Return ONLY valid JSON with these sections:
+
+    "analysis": an ATS-style match analysis. overall_match and keyword_match_score are 0-100;
+        categories.technical_skills / soft_skills / experience each carry a 0-100 match plus the
+        present/missing skills, strengths and gaps; ats_optimization lists formatting issues and
+        keyword fixes; impact_scoring rates achievement_metrics, action_verbs and quantifiable_results 0-100.
+    "enhancement": summary_section.sample_summary is a 3-4 sentence summary tailored to the JD;
+        bullet_points.weak_bullets {weak_hint} and
+        bullet_points.improved_versions rewrites each with the STAR method and concrete numbers;
+        power_verbs.suggested_verbs lists 5 action verbs relevant to the JD.
+    "linkedin": 3 headline_suggestions, a ~100 word storytelling about_section,
+        5 skills_to_add and 2 profile_optimization tips.
+    "interview": 2 preparation_tips, 2 technical questions_to_expect and 2 behavioral_questions.
+    "cover_letter": a professional cover letter in Markdown.
+
+    JD: {job_desc}
+    Resume: {resume_text}
+    """
+    data = generate_structured(model, prompt, REPORT_SCHEMA, on_partial=on_partial)
+    if data and weak and isinstance(data.get("enhancement"), dict):
+        data["enhancement"]["bullet_points"]["weak_bullets"] = [b["text"] for b in weak]
+    return data
@@ -0,0 +1,121 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from llm_cache import CACHE_DIR
+
+# Candidate analyses are stored once and browsed from SQLite: the leaderboard
+# reads one page at a time with sort and filters done in SQL, so paging
+# through a thousand candidates costs no API calls and renders in constant
+# time. Rows belong to a batch job and are keyed by the job's item id, so
+# same-named uploads stay separate and one batch (or session) never shows
+# another's candidates. The JD hash (jd_profile.jd_fingerprint) is kept for
+# lookups across jobs; missing skills live in a side table for filtering.
+SORTS = {
+    "score": "match_score",
+    "local": "local_score",
+    "filename": "filename COLLATE NOCASE",
+}
+
+def _skill(name):
+    return " ".join(str(name).split()).lower()
+
+class ResultsStore:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, "results.sqlite3")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "job_id TEXT NOT NULL, item_id TEXT NOT NULL, jd_hash TEXT NOT NULL, filename TEXT NOT NULL, "
+                "match_score REAL NOT NULL, local_score REAL, data TEXT NOT NULL, updated REAL NOT NULL, "
+                "PRIMARY KEY (job_id, item_id))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS results_score ON results (job_id, match_score)")
+            db.execute("CREATE INDEX IF NOT EXISTS results_local ON results (job_id, local_score)")
+            db.execute("CREATE INDEX IF NOT EXISTS results_filename ON results (job_id, filename)")
+            db.execute("CREATE INDEX IF NOT EXISTS results_jd ON results (jd_hash)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS missing_skills ("
+                "job_id TEXT NOT NULL, item_id TEXT NOT NULL, skill TEXT NOT NULL, "
+                "PRIMARY KEY (job_id, skill, item_id))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def put(self, job_id, item_id, jd_hash, data):
+        # data is a candidate analysis carrying 'filename' and 'match_score'
+        item_id = str(item_id)
+        skills = {_skill(s) for s in data.get('missing_skills', []) if str(s).strip()}
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO results (job_id, item_id, jd_hash, filename, match_score, local_score, data, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, item_id, jd_hash, data['filename'], float(data['match_score']), data.get('local_score'),
+                 json.dumps(data), time.time()),
+            )
+            db.execute("DELETE FROM missing_skills WHERE job_id = ? AND item_id = ?", (job_id, item_id))
+            db.executemany(
+                "INSERT INTO missing_skills (job_id, item_id, skill) VALUES (?, ?, ?)",
+                [(job_id, item_id, skill) for skill in skills],
+            )
+
+    def _where(self, job_id, min_score, max_score, exclude_missing):
+        clauses = ["job_id = ?", "match_score BETWEEN ? AND ?"]
+        params = [job_id, min_score, max_score]
+        skills = [_skill(s) for s in exclude_missing or ()]
+        if skills:
+            # Hide candidates missing any of the given skills
+            clauses.append(
+                "item_id NOT IN (SELECT item_id FROM missing_skills WHERE job_id = ? AND skill IN (%s))"
+                % ",".join("?" * len(skills))
+            )
+            params += [job_id, *skills]
+        return " AND ".join(clauses), params
+
+    def count(self, job_id, min_score=0, max_score=100, exclude_missing=None):
+        where, params = self._where(job_id, min_score, max_score, exclude_missing)
+        with self._connect() as db:
+            return db.execute(f"SELECT COUNT(*) FROM results WHERE {where}", params).fetchone()[0]
+
+    def page(self, job_id, offset=0, limit=25, sort="score", descending=True,
+             min_score=0, max_score=100, exclude_missing=None):
+        where, params = self._where(job_id, min_score, max_score, exclude_missing)
+        order = f"{SORTS[sort]} {'DESC' if descending else 'ASC'}, filename, item_id"
+        with self._connect() as db:
+            rows = db.execute(
+                f"SELECT data FROM results WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def missing_skills(self, job_id, limit=50):
+        # Most common gaps first, for the filter picker
+        with self._connect() as db:
+            return db.execute(
+                "SELECT skill, COUNT(*) AS n FROM missing_skills WHERE job_id = ? GROUP BY skill ORDER BY n DESC, skill LIMIT ?",
+                (job_id, limit),
+            ).fetchall()
+
+    def clear(self, job_id=None):
+        with self._lock, self._connect() as db:
+            if job_id is None:
+                db.execute("DELETE FROM results")
+                db.execute("DELETE FROM missing_skills")
+            else:
+                db.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+                db.execute("DELETE FROM missing_skills WHERE job_id = ?", (job_id,))
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultsStore()
+        return _store
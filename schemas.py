@@ -0,0 +1,179 @@
+import copy
+import json
+import re
+
+# Response schemas for every JSON-producing feature. They are written in a
+# small JSON-schema subset (type / properties / items / required) that maps
+# directly onto Gemini's response_schema, and are also used to validate and
+# repair replies locally.
+
+def _str():
+    return {"type": "string"}
+
+def _num():
+    return {"type": "number"}
+
+def _list(items=None):
+    return {"type": "array", "items": items or _str()}
+
+def _obj(properties, required=None):
+    return {"type": "object", "properties": properties, "required": list(required or properties)}
+
+CANDIDATE_SCHEMA = _obj({
+    "match_score": _num(),
+    "match_level": _str(),
+    "executive_summary": _str(),
+    "strengths": _list(),
+    "missing_skills": _list(),
+    "recommendations": _list(_obj({"title": _str(), "description": _str()})),
+})
+
+# Several candidates scored in one request; entries are matched back by their prompt id (C1..Cn)
+CANDIDATE_BATCH_SCHEMA = _obj({
+    "candidates": _list(_obj({"candidate_id": _str(), **CANDIDATE_SCHEMA["properties"]})),
+})
+
+MATCH_ANALYSIS_SCHEMA = _obj({
+    "overall_match": _num(),
+    "keyword_match_score": _num(),
+    "categories": _obj({
+        "technical_skills": _obj({
+            "match": _num(), "present_skills": _list(), "missing_skills": _list(), "improvement_suggestions": _list(),
+        }),
+        "soft_skills": _obj({"match": _num(), "present_skills": _list(), "missing_skills": _list()}),
+        "experience": _obj({"match": _num(), "strengths": _list(), "gaps": _list()}),
+    }),
+    "ats_optimization": _obj({"formatting_issues": _list(), "keyword_optimization": _list()}),
+    "impact_scoring": _obj({
+        "achievement_metrics": _num(), "action_verbs": _num(), "quantifiable_results": _num(), "improvement_suggestions": _list(),
+    }),
+})
+
+ENHANCEMENT_SCHEMA = _obj({
+    "summary_section": _obj({"has_summary": {"type": "boolean"}, "sample_summary": _str()}),
+    "bullet_points": _obj({"weak_bullets": _list(), "improved_versions": _list()}),
+    "power_verbs": _obj({"suggested_verbs": _list()}),
+})
+
+LINKEDIN_SCHEMA = _obj({
+    "headline_suggestions": _list(),
+    "about_section": _str(),
+    "skills_to_add": _list(),
+    "profile_optimization": _list(),
+})
+
+INTERVIEW_SCHEMA = _obj({
+    "preparation_tips": _list(),
+    "questions_to_expect": _list(),
+    "behavioral_questions": _list(),
+})
+
+JD_REQUIREMENTS_SCHEMA = _obj({
+    "title": _str(),
+    "seniority": _str(),
+    "domain": _str(),
+    "min_years_experience": _num(),
+    "required_skills": _list(),
+    "optional_skills": _list(),
+    "responsibilities": _list(),
+    "education": _str(),
+})
+
+# All per-feature sections in one reply, for the fused full-report call
+REPORT_SCHEMA = _obj({
+    "analysis": MATCH_ANALYSIS_SCHEMA,
+    "enhancement": ENHANCEMENT_SCHEMA,
+    "linkedin": LINKEDIN_SCHEMA,
+    "interview": INTERVIEW_SCHEMA,
+    "cover_letter": _str(),
+})
+
+_TYPES = {
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+def to_gemini_schema(schema):
+    # Gemini expects upper-case type names (OBJECT, ARRAY, STRING, ...)
+    out = {"type": schema["type"].upper()}
+    if "properties" in schema:
+        out["properties"] = {k: to_gemini_schema(v) for k, v in schema["properties"].items()}
+        out["required"] = list(schema.get("required", []))
+    if "items" in schema:
+        out["items"] = to_gemini_schema(schema["items"])
+    return out
+
+def generation_config(schema, native_schema=True):
+    config = {"response_mime_type": "application/json"}
+    if native_schema:
+        config["response_schema"] = to_gemini_schema(schema)
+    return config
+
+def coerce(data, schema):
+    # Fixes cheap type slips locally ("85%" -> 85, "true" -> True) so they
+    # never cost a repair round trip
+    kind = schema["type"]
+    if kind in ("number", "integer") and isinstance(data, str):
+        match = re.search(r"-?\d+(?:\.\d+)?", data)
+        if match:
+            value = float(match.group())
+            return int(value) if kind == "integer" or value.is_integer() else value
+    if kind == "boolean" and isinstance(data, str) and data.strip().lower() in ("true", "false"):
+        return data.strip().lower() == "true"
+    if kind == "array" and isinstance(data, list) and "items" in schema:
+        return [coerce(item, schema["items"]) for item in data]
+    if kind == "array" and isinstance(data, str):
+        return [coerce(data, schema.get("items", {"type": "string"}))]
+    if kind == "object" and isinstance(data, dict):
+        props = schema.get("properties", {})
+        return {k: coerce(v, props[k]) if k in props else v for k, v in data.items()}
+    return data
+
+def validate(data, schema, path=""):
+    # Returns a list of dotted paths that are missing or of the wrong type
+    expected = _TYPES[schema["type"]]
+    if not isinstance(data, expected) or (schema["type"] in ("number", "integer") and isinstance(data, bool)):
+        return [path or "$"]
+    problems = []
+    if schema["type"] == "object":
+        for key in schema.get("required", []):
+            sub_path = f"{path}.{key}" if path else key
+            if key not in data:
+                problems.append(sub_path)
+            else:
+                problems.extend(validate(data[key], schema["properties"][key], sub_path))
+    elif schema["type"] == "array" and "items" in schema:
+        for i, item in enumerate(data):
+            problems.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    return problems
+
+def _top_level_key(path):
+    return re.split(r"[.\[]", path, maxsplit=1)[0]
+
+def subschema(schema, problems):
+    # Schema restricted to the top-level fields that have problems
+    keys = [k for k in schema["properties"] if k in {_top_level_key(p) for p in problems}]
+    return _obj({k: schema["properties"][k] for k in keys})
+
+def repair_prompt(prompt, data, problems):
+    keys = sorted({_top_level_key(p) for p in problems})
+    return f"""{prompt}
+
+    A previous reply to this request was incomplete. It already contained:
+    {json.dumps(data, ensure_ascii=False)}
+
+    Return ONLY a JSON object with these fields, complete and valid: {", ".join(keys)}.
+    Do not repeat any other field.
+    """
+
+def merge(data, patch, schema):
+    # Takes only the fields the repair was asked for; the rest stay as they were
+    merged = copy.deepcopy(data)
+    for key, value in patch.items():
+        if key in schema["properties"]:
+            merged[key] = value
+    return merged
@@ -0,0 +1,107 @@
+import re
+from functools import lru_cache
+
+from utils import PAGE_BREAK
+
+# Splits resume text into its usual sections once (cached by content) and
+# indexes the achievement bullets. Each feature declares the sections it
+# reads, so prompts carry only the relevant slices of the resume.
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about", "about me", "overview"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "core competencies",
+               "competencies", "technologies", "tools", "tech stack", "skills & tools"],
+    "education": ["education", "academic background", "qualifications", "certifications",
+                  "education & certifications", "courses", "training"],
+    "projects": ["projects", "personal projects", "key projects", "selected projects", "side projects"],
+    "other": ["awards", "achievements", "publications", "languages", "interests", "volunteering",
+              "volunteer experience", "activities", "references", "honors"],
+}
+# "contact" is everything above the first heading (name, title, email, phone)
+SECTIONS = ("contact", "summary", "experience", "skills", "education", "projects", "other")
+
+# None means the feature reads the whole resume
+FEATURE_SECTIONS = {
+    "candidate": ("summary", "experience", "skills", "education", "projects", "other"),
+    "match_analysis": ("summary", "experience", "skills", "education", "projects", "other"),
+    "enhancement": ("summary", "experience", "projects"),
+    "linkedin": ("contact", "summary", "skills", "experience"),
+    "cover_letter": ("contact", "summary", "experience", "skills", "projects"),
+    "interview": ("experience", "projects", "skills"),
+    "report": None,
+}
+
+_HEADING_LOOKUP = {name: section for section, names in SECTION_HEADINGS.items() for name in names}
+_BULLET = re.compile(r"^[•●▪■‣⁃∙*·\-–—]+\s*")
+# Bullets scoring below this are vague enough to be worth rewriting: short,
+# unquantified, or opening with "responsible for" and the like
+WEAK_BULLET_SCORE = 2.0
+_WEAK_OPENERS = re.compile(r"^(responsible for|helped|assisted|worked on|involved in|participated in|duties included|tasked with)\b", re.IGNORECASE)
+
+def _heading(line):
+    key = re.sub(r"[^a-z& ]", "", line.lower().rstrip(":")).strip()
+    if len(line) > 40 or not key:
+        return None
+    return _HEADING_LOOKUP.get(key)
+
+@lru_cache(maxsize=256)
+def segment(text):
+    # Returns {"sections": {name: text}, "bullets": [{"id", "section", "text"}]}.
+    # Treat the result as read-only; it is shared through the cache.
+    sections = {}
+    bullets = []
+    current = "contact"
+    headings = 0
+    for raw in (text or "").replace(PAGE_BREAK, "\n").splitlines():
+        line = raw.strip()
+        section = _heading(line) if line else None
+        if section:
+            current = section
+            headings += 1
+            sections.setdefault(current, [])
+            continue
+        sections.setdefault(current, []).append(line)
+        if current in ("experience", "projects") and line:
+            is_bullet = bool(_BULLET.match(line))
+            if is_bullet or len(line.split()) >= 8:
+                bullets.append({"id": f"B{len(bullets) + 1}", "section": current, "text": _BULLET.sub("", line)})
+    return {
+        "sections": {name: "\n".join(lines).strip() for name, lines in sections.items()},
+        "bullets": bullets,
+        "headings": headings,
+    }
+
+def slice_resume(text, wanted):
+    # Only the wanted sections, each under its heading. Resumes without
+    # recognizable headings (or with nothing in the wanted ones) pass through whole.
+    if not wanted:
+        return text
+    parsed = segment(text)
+    if parsed["headings"] < 2:
+        return text
+    parts = []
+    for name in SECTIONS:
+        body = parsed["sections"].get(name)
+        if name in wanted and body:
+            parts.append(body if name == "contact" else f"{name.upper()}:\n{body}")
+    return "\n\n".join(parts) or text
+
+def slice_for(feature, text):
+    return slice_resume(text, FEATURE_SECTIONS.get(feature))
+
+def _bullet_strength(bullet):
+    text = bullet["text"]
+    words = len(text.split())
+    score = min(words, 30) / 10
+    score += 2 if re.search(r"\d", text) else 0      # quantified results
+    score -= 2 if _WEAK_OPENERS.match(text) else 0
+    return score
+
+def weakest_bullets(text, n=3):
+    # Up to n weak achievement bullets, in resume order. Empty when none is
+    # weak; callers then let the model choose.
+    bullets = [b for b in segment(text)["bullets"] if _bullet_strength(b) < WEAK_BULLET_SCORE]
+    weakest = sorted(bullets, key=_bullet_strength)[:n]
+    return sorted(weakest, key=lambda b: int(b["id"][1:]))
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+import llm
+from analysis import get_candidate_scores
+
+
+def _entry(score, **extra):
+    return {
+        "match_score": score,
+        "match_level": "High",
+        "executive_summary": "Fits.",
+        "strengths": ["python"],
+        "missing_skills": ["go"],
+        "recommendations": [{"title": "t", "description": "d"}],
+        **extra,
+    }
+
+
+class _Reply:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+
+
+class ScriptedModel:
+    # Answers the batched prompt with `batch_entries` and every single-resume
+    # prompt with a fixed score, recording which kind of call was made
+    model_name = "models/scripted"
+
+    def __init__(self, batch_entries):
+        self.batch_entries = batch_entries
+        self.singles = 0
+        self.batches = 0
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        if "=== CANDIDATE C" in prompt:
+            self.batches += 1
+            return _Reply(json.dumps({"candidates": self.batch_entries}))
+        self.singles += 1
+        return _Reply(json.dumps(_entry(50)))
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    llm.response_cache.clear()
+
+
+def test_batch_maps_entries_by_candidate_id():
+    model = ScriptedModel([_entry(70, candidate_id="C2"), _entry(90, candidate_id="c1")])
+    scores = get_candidate_scores(model, ["resume one", "resume two"], "python developer")
+    assert [s["match_score"] for s in scores] == [90, 70]
+    assert all("candidate_id" not in s for s in scores)
+    assert model.singles == 0
+
+
+def test_missing_or_unknown_id_falls_back_to_single_call():
+    model = ScriptedModel([_entry(90, candidate_id="C1"), _entry(70), _entry(60, candidate_id="C9")])
+    scores = get_candidate_scores(model, ["resume one", "resume two", "resume three"], "python developer")
+    assert [s["match_score"] for s in scores] == [90, 50, 50]
+    assert model.singles == 2
+
+
+def test_empty_batch():
+    model = ScriptedModel([])
+    assert get_candidate_scores(model, [], "python developer") == []
+    assert model.batches == model.singles == 0
@@ -0,0 +1,29 @@
+from compaction import compact, estimate_tokens, strip_page_boilerplate, trim_to_budget
+from utils import PAGE_BREAK
+
+
+def test_page_numbers_are_dropped_only_at_page_edges():
+    text = PAGE_BREAK.join([
+        "Jane Doe\nEngineer\nRevenue grown by\n100\npercent\n1",
+        "Jane Doe\nExperience\nTeam of\n12\npeople\nPage 2 of 3",
+        "2/3\nSkills\n2019\nmore",
+    ])
+    lines = strip_page_boilerplate(text).splitlines()
+    assert lines == ["Jane Doe", "Engineer", "Revenue grown by", "100", "percent",
+                     "Experience", "Team of", "12", "people", "Skills", "2019", "more"]
+
+
+def test_single_page_is_left_alone():
+    assert strip_page_boilerplate("Jane Doe\n100\nPage 1") == "Jane Doe\n100\nPage 1"
+
+
+def test_trim_keeps_headings_and_keyword_lines():
+    lines = ["Jane Doe", "EXPERIENCE"] + [f"filler line number {n} with nothing useful" for n in range(50)]
+    lines.insert(30, "- Built Kubernetes platform serving 2M users")
+    trimmed = trim_to_budget("\n".join(lines), 60, keywords={"kubernetes"})
+    assert estimate_tokens(trimmed) <= 60
+    assert "EXPERIENCE" in trimmed and "Kubernetes platform" in trimmed
+
+
+def test_compact_normalizes_whitespace():
+    assert compact("•  Led   the team\nmanage-\nment\n\n\n\nEnd") == "- Led the team\nmanagement\n\nEnd"
@@ -0,0 +1,39 @@
+import glob
+import os
+import tempfile
+
+from benchmark import make_pdf
+from extraction import PAGES_PER_TASK, extract_many
+from utils import PAGE_BREAK, clear_text_cache
+
+
+def _pdf(pages, tag):
+    return make_pdf([[f"{tag} page {n}"] for n in range(pages)])
+
+
+def test_long_pdfs_are_split_into_ordered_page_ranges(tmp_path):
+    clear_text_cache()
+    pages = PAGES_PER_TASK * 2 + 3
+    path = tmp_path / "long.pdf"
+    path.write_bytes(_pdf(pages, "path"))
+    scratch_dirs = set(glob.glob(os.path.join(tempfile.gettempdir(), "jobfit-extract-*")))
+
+    from_path, from_bytes, broken = extract_many([str(path), _pdf(pages, "bytes"), b"not a pdf"])
+
+    for result, tag in ((from_path, "path"), (from_bytes, "bytes")):
+        assert result["error"] is None
+        assert (result["pages"], result["pages_read"]) == (pages, pages)
+        texts = result["text"].split(PAGE_BREAK)
+        assert [t.strip() for t in texts] == [f"{tag} page {n}" for n in range(pages)]
+    assert broken["error"].startswith("extraction failed")
+    # Spilled uploads are removed afterwards
+    assert set(glob.glob(os.path.join(tempfile.gettempdir(), "jobfit-extract-*"))) == scratch_dirs
+
+
+def test_max_pages_truncates_and_cache_is_reused():
+    clear_text_cache()
+    data = _pdf(12, "cut")
+    result, = extract_many([data], max_pages=5)
+    assert (result["pages"], result["pages_read"], result["truncated"]) == (12, 5, True)
+    again, = extract_many([data], max_pages=5)
+    assert again["cached"] and again["text"] == result["text"]
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from jobs import JobRunner, JobStore
+
+
+@pytest.fixture
+def runner(tmp_path):
+    return JobRunner(JobStore(str(tmp_path / "jobs.sqlite3")))
+
+
+def _wait(runner, job_id):
+    for _ in range(200):
+        if not runner.is_running(job_id):
+            return runner.store.get(job_id)
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_records_every_item(runner):
+    job_id = runner.submit("batch", [1, 2, 3], lambda n: n * 10, max_workers=2, meta={"k": "v"})
+    job = _wait(runner, job_id)
+    assert (job["status"], job["done"], job["failed"], job["meta"]) == ("done", 3, 0, {"k": "v"})
+
+
+def test_resume_retries_failed_items(runner):
+    attempts = []
+
+    def flaky(n):
+        attempts.append(n)
+        return None if n == 2 and attempts.count(2) == 1 else n
+
+    job_id = runner.submit("batch", [1, 2, 3], flaky, max_workers=1)
+    job = _wait(runner, job_id)
+    assert (job["done"], job["failed"]) == (3, 1)
+
+    assert runner.resume(job_id, flaky, max_workers=1)
+    job = _wait(runner, job_id)
+    assert (job["status"], job["done"], job["failed"]) == ("done", 3, 0)
+    assert sorted(attempts) == [1, 2, 2, 3]
+    assert not runner.resume(job_id, flaky, max_workers=1)
+
+
+def test_batched_item_with_a_failed_entry_is_failed(runner):
+    job_id = runner.submit("batch", [[1, 2]], lambda pair: [pair[0], None], max_workers=1)
+    assert _wait(runner, job_id)["failed"] == 1
+
+
+def test_restart_marks_running_jobs_interrupted(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create("batch", ["a", "b"])
+    store.set_status(job_id, "running")
+    store.record(job_id, 0, "ok")
+
+    runner = JobRunner(store)  # a fresh process
+    assert store.get(job_id)["status"] == "interrupted"
+    assert store.pending(job_id) == [(1, "b")]
+    assert runner.resume(job_id, lambda item: item.upper(), max_workers=1)
+    assert _wait(runner, job_id)["done"] == 2
@@ -0,0 +1,154 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import llm
+import ratelimit
+from llm import DeadlineExceeded, deadline, generate_text
+
+
+class _Usage:
+    prompt_token_count = 10
+    candidates_token_count = 5
+
+
+class _Reply:
+    text = "ok"
+    usage_metadata = _Usage()
+
+
+class SlowModel:
+    # Sleeps delays[i] on the i-th call (the last delay repeats); optionally
+    # tiered, with a slot, a timeout and a fixed p95
+    model_name = "models/slow"
+
+    def __init__(self, *delays, timeout=None, concurrency=None, p95=None):
+        self.delays = list(delays)
+        self.timeout = timeout
+        if concurrency:
+            self.slot = threading.BoundedSemaphore(concurrency)
+        self.p95 = p95
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def latency_percentile(self, pct):
+        return self.p95
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            delay = self.delays[min(self.calls, len(self.delays) - 1)]
+            self.calls += 1
+        time.sleep(delay)
+        return _Reply()
+
+
+class RecordingLimiter(ratelimit.UnlimitedLimiter):
+    def __init__(self):
+        self.settled = []
+
+    def settle(self, charged, actual):
+        self.settled.append((charged, actual))
+
+
+@pytest.fixture(autouse=True)
+def limiter(monkeypatch):
+    limiter = RecordingLimiter()
+    monkeypatch.setattr(ratelimit, "default_limiter", limiter)
+    return limiter
+
+
+def _isolated(fn):
+    # Hedging is a contextvar; keep each test's setting to itself
+    return contextvars.copy_context().run(fn)
+
+
+def test_tier_timeout_caps_the_call(monkeypatch):
+    monkeypatch.setattr(llm, "CALL_TIMEOUT_SECONDS", 0.05)
+    assert generate_text(SlowModel(0.2, timeout=1), "p1", use_cache=False) == "ok"
+    with pytest.raises(TimeoutError) as error:
+        generate_text(SlowModel(0.5, timeout=0.1), "p2", use_cache=False)
+    assert not isinstance(error.value, DeadlineExceeded)
+
+
+def test_deadline_shortens_the_call():
+    started = time.monotonic()
+    with deadline(0.1), pytest.raises(DeadlineExceeded):
+        generate_text(SlowModel(1.0), "p3", use_cache=False)
+    assert time.monotonic() - started < 0.5
+
+
+def test_deadline_passed_while_waiting_for_a_slot():
+    model = SlowModel(0.5, concurrency=1)
+    holder = threading.Thread(target=generate_text, args=(model, "p4"), kwargs={"use_cache": False})
+    holder.start()
+    time.sleep(0.05)
+    with deadline(0.1), pytest.raises(DeadlineExceeded):
+        generate_text(model, "p5", use_cache=False)
+    holder.join()
+    assert model.calls == 1
+
+
+def test_deadline_passed_while_waiting_for_the_limiter(monkeypatch):
+    limiter = ratelimit.RateLimiter(requests_per_minute=1)
+    limiter.acquire(1)  # empty the bucket
+    monkeypatch.setattr(ratelimit, "default_limiter", limiter)
+    model = SlowModel(0.0)
+    started = time.monotonic()
+    with deadline(0.2), pytest.raises(DeadlineExceeded):
+        generate_text(model, "p6", use_cache=False)
+    assert time.monotonic() - started < 1
+    assert model.calls == 0
+    assert not limiter._order and not limiter._queues
+
+
+def test_single_flight_follower_gives_up_at_its_timeout():
+    flight = ratelimit.SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=flight.do, args=("k", lambda: release.wait(2)))
+    leader.start()
+    time.sleep(0.05)
+    with pytest.raises(DeadlineExceeded):
+        flight.do("k", lambda: None, timeout=0.05)
+    release.set()
+    leader.join()
+
+
+def test_hedge_wins_and_its_charge_is_settled(limiter):
+    model = SlowModel(1.0, 0.01, concurrency=2, p95=0.05)
+
+    def run():
+        llm.set_hedging(True)
+        return generate_text(model, "p7", use_cache=False)
+
+    started = time.monotonic()
+    assert _isolated(run) == "ok"
+    assert time.monotonic() - started < 0.5
+    assert model.calls == 2
+    # The primary's charge and the hedge's are both settled to real usage
+    assert sorted(actual for _, actual in limiter.settled) == [15, 15]
+
+
+def test_hedge_charge_refunded_when_never_sent():
+    limiter = RecordingLimiter()
+    future = Future()
+    future.cancel()
+    llm._settle_hedge(limiter, 100)(future)
+    failed = Future()
+    failed.set_exception(llm._NotSent("abandoned before it was sent"))
+    llm._settle_hedge(limiter, 100)(failed)
+    assert limiter.settled == [(100, 0), (100, 0)]
+
+
+def test_on_partial_streams_fields_before_the_reply_ends():
+    from fake_model import FakeModel
+    from schemas import CANDIDATE_SCHEMA
+
+    seen = []
+    data = llm.generate_structured(FakeModel(latency=0.01, jitter=0), "p8", CANDIDATE_SCHEMA, use_cache=False,
+                                   on_partial=lambda partial: seen.append(dict(partial)))
+    assert isinstance(data["match_score"], (int, float))
+    assert len(seen) > 1
+    assert any("match_score" in partial and "recommendations" not in partial for partial in seen)
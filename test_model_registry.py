@@ -0,0 +1,62 @@
+import json
+
+from fake_model import FakeModel
+from model_registry import ModelRegistry
+
+
+def _registry(available=None, config_path=None):
+    return ModelRegistry(config_path=config_path, available=available, loader=lambda name: FakeModel(model_name=name))
+
+
+def test_routes_and_fallback():
+    registry = _registry(available={"gemini-2.5-flash", "gemini-2.5-flash-lite"})
+    assert registry.tier_for("triage") == "lite"
+    assert registry.tier_for("candidate") == "standard"
+    assert registry.tier_for("unknown feature") == "standard"
+
+    registry = _registry(available={"gemini-2.5-flash"})
+    assert registry.tier_for("triage") == "standard"  # lite model unavailable
+
+
+def test_config_overrides(tmp_path):
+    path = tmp_path / "models.json"
+    path.write_text(json.dumps({"tiers": {"deep": {"concurrency": 3}, "bulk": {"model": "m-bulk"}},
+                                "routes": {"report": "deep", "triage": "bulk"}}))
+    registry = _registry(config_path=str(path))
+    assert registry.tier_for("report") == "deep"
+    assert registry.concurrency("deep") == 3
+    assert registry.model_for("triage").model_name == "m-bulk"
+    assert registry.concurrency("bulk") == 4  # new tiers start from "standard"
+
+
+def test_tiered_models_share_their_tier_slots_and_timeout():
+    registry = _registry()
+    model = registry.model_for("report")
+    assert model is registry.model_for("candidate")
+    assert model.slot is registry.slot("standard")
+    assert model.timeout == 90
+    held = [model.slot.acquire(blocking=False) for _ in range(registry.concurrency("standard") + 1)]
+    assert held == [True] * registry.concurrency("standard") + [False]
+
+
+def test_latency_window():
+    registry = _registry()
+    model = registry.model_for("triage")
+    for _ in range(19):
+        model.generate_content("prompt")
+    assert model.latency_percentile(95) is None
+    model.generate_content("prompt")
+    assert model.latency_percentile(95) < 1
+
+    # Only the last LATENCY_WINDOW samples count
+    for seconds in range(300):
+        registry.record_latency("lite", seconds)
+    assert registry.latency_percentile("lite", 50) == 200
+    assert model.latency_percentile(95) == 290
+
+
+def test_pin_serves_every_tier_with_one_model():
+    registry = _registry(available=set())
+    registry.pin("gemini-custom")
+    assert {registry.model_for(f).model_name for f in ("triage", "candidate", "report")} == {"gemini-custom"}
+    assert registry.model_for("triage").slot is registry.slot("lite")
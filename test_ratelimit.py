@@ -0,0 +1,151 @@
+import threading
+import time
+
+import pytest
+
+import ratelimit
+from ratelimit import RateLimiter, SingleFlight, call_with_backoff, is_quota_error, retry_delay
+
+
+def _drain(limiter):
+    while limiter.try_acquire(1):
+        pass
+
+
+def test_token_bucket_waits_for_tokens():
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=60_000)  # 1000 tokens/s
+    assert limiter.acquire(60_000) == 60_000
+    assert limiter.try_acquire(100) == 0
+    started = time.monotonic()
+    limiter.acquire(100)
+    assert 0.05 < time.monotonic() - started < 1
+
+
+def test_settle_refunds_unused_tokens():
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=1000)
+    charged = limiter.acquire(1000)
+    assert limiter.try_acquire(500) == 0
+    limiter.settle(charged, 200)
+    assert limiter.try_acquire(500) == 500
+
+
+def test_sessions_take_turns():
+    limiter = RateLimiter(requests_per_minute=600)  # one request per 0.1s once drained
+    _drain(limiter)
+    order = []
+
+    def take(session):
+        limiter.acquire(1, session=session)
+        order.append(session)
+
+    threads = []
+    for session in ("a", "a", "b"):
+        threads.append(threading.Thread(target=take, args=(session,)))
+        threads[-1].start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    assert order == ["a", "b", "a"]
+
+
+def test_acquire_timeout_leaves_the_queue():
+    limiter = RateLimiter(requests_per_minute=1)
+    _drain(limiter)
+    with pytest.raises(ratelimit.DeadlineExceeded):
+        limiter.acquire(1, timeout=0.05)
+    assert not limiter._order and not limiter._queues
+
+
+def test_quota_errors():
+    assert is_quota_error(RuntimeError("429 Resource has been exhausted (e.g. check quota)."))
+    assert not is_quota_error(RuntimeError("500 internal error"))
+    assert retry_delay(RuntimeError("Please retry in 12.5s."), 0) == 12.5
+    assert retry_delay(RuntimeError("retry_delay { seconds: 7 }"), 0) == 7
+    assert 1.6 <= retry_delay(RuntimeError("429"), 0) <= 2.4
+
+
+class RecordingLimiter(ratelimit.UnlimitedLimiter):
+    def __init__(self):
+        self.pauses = []
+        self.settled = []
+
+    def pause(self, seconds):
+        self.pauses.append(seconds)
+
+    def settle(self, charged, actual):
+        self.settled.append((charged, actual))
+
+
+def test_backoff_retries_quota_errors_only():
+    limiter = RecordingLimiter()
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("429 quota exceeded, retry in 0.5s")
+        return "ok", 40
+
+    assert call_with_backoff(flaky, 100, limiter) == "ok"
+    assert limiter.pauses == [0.5, 0.5]
+    assert limiter.settled == [(100, 40)]
+
+    def broken():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        call_with_backoff(broken, 100, limiter)
+    assert len(limiter.pauses) == 2
+
+
+def test_backoff_gives_up_after_max_retries():
+    limiter = RecordingLimiter()
+
+    def always_limited():
+        raise RuntimeError("429 retry in 0s")
+
+    with pytest.raises(RuntimeError):
+        call_with_backoff(always_limited, 100, limiter)
+    assert len(limiter.pauses) == ratelimit.MAX_RETRIES
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return "reply"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["reply"] * 4
+    assert len(calls) == 1
+    assert flight.do("key", lambda: "again") == "again"
+
+
+def test_single_flight_shares_errors():
+    flight = SingleFlight()
+    errors = []
+
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    def call():
+        try:
+            flight.do("key", fail)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == ["boom"] * 3
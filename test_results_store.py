@@ -0,0 +1,50 @@
+import pytest
+
+from results_store import ResultsStore
+
+
+def _analysis(filename, score, local=0.0, missing=()):
+    return {"filename": filename, "match_score": score, "local_score": local, "missing_skills": list(missing)}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.sqlite3"))
+    for n, (name, score, local, missing) in enumerate([
+        ("b.pdf", 80, 10, ["Go"]),
+        ("a.pdf", 95, 30, []),
+        ("c.pdf", 60, 20, ["go", "Kubernetes"]),
+        ("a.pdf", 70, 40, ["kubernetes"]),  # same filename, different upload
+    ]):
+        store.put("job1", n, "jd", _analysis(name, score, local, missing))
+    store.put("job2", 0, "jd", _analysis("other.pdf", 99))
+    return store
+
+
+def _scores(rows):
+    return [row["match_score"] for row in rows]
+
+
+def test_pages_are_sorted_and_scoped_to_the_job(store):
+    assert store.count("job1") == 4
+    assert _scores(store.page("job1", limit=2)) == [95, 80]
+    assert _scores(store.page("job1", offset=2, limit=2)) == [70, 60]
+    assert _scores(store.page("job1", sort="score", descending=False)) == [60, 70, 80, 95]
+    assert [r["local_score"] for r in store.page("job1", sort="local")] == [40, 30, 20, 10]
+    assert [r["filename"] for r in store.page("job1", sort="filename", descending=False)] == ["a.pdf", "a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_filters(store):
+    assert _scores(store.page("job1", min_score=65, max_score=90)) == [80, 70]
+    assert store.count("job1", exclude_missing=["GO"]) == 2
+    assert _scores(store.page("job1", exclude_missing=["go", "kubernetes"])) == [95]
+    assert store.missing_skills("job1") == [("go", 2), ("kubernetes", 2)]
+
+
+def test_put_replaces_an_item_and_clear_is_per_job(store):
+    store.put("job1", 0, "jd", _analysis("b.pdf", 50))
+    assert store.count("job1") == 4
+    assert store.count("job1", exclude_missing=["go"]) == 3
+    store.clear("job1")
+    assert store.count("job1") == 0
+    assert store.count("job2") == 1
@@ -0,0 +1,80 @@
+import schemas
+from schemas import CANDIDATE_SCHEMA, INTERVIEW_SCHEMA, coerce, merge, repair_prompt, subschema, validate
+
+
+def test_coerce_fixes_cheap_type_slips():
+    data = coerce({"match_score": "85%", "strengths": "python", "extra": 1}, CANDIDATE_SCHEMA)
+    assert data == {"match_score": 85, "strengths": ["python"], "extra": 1}
+    assert coerce({"has_summary": "True"}, schemas.ENHANCEMENT_SCHEMA["properties"]["summary_section"]) == {"has_summary": True}
+    assert coerce("7.5", {"type": "number"}) == 7.5
+
+
+def test_validate_reports_missing_and_mistyped_paths():
+    data = {
+        "match_score": True,
+        "match_level": "High",
+        "strengths": [],
+        "missing_skills": ["go", 3],
+        "recommendations": [{"title": "t"}],
+    }
+    assert validate(data, CANDIDATE_SCHEMA) == [
+        "match_score", "executive_summary", "missing_skills[1]", "recommendations[0].description",
+    ]
+    assert validate({"preparation_tips": [], "questions_to_expect": [], "behavioral_questions": []}, INTERVIEW_SCHEMA) == []
+
+
+def test_repair_asks_only_for_broken_fields():
+    problems = ["executive_summary", "recommendations[0].description"]
+    sub = subschema(CANDIDATE_SCHEMA, problems)
+    assert list(sub["properties"]) == ["executive_summary", "recommendations"]
+    prompt = repair_prompt("Analyze.", {"match_score": 80}, problems)
+    assert "executive_summary, recommendations" in prompt and '"match_score": 80' in prompt
+
+    data = {"match_score": 80, "executive_summary": None}
+    patch = {"executive_summary": "Fits.", "match_score": 10, "recommendations": []}
+    assert merge(data, patch, sub) == {"match_score": 80, "executive_summary": "Fits.", "recommendations": []}
+    assert data["executive_summary"] is None
+
+
+def test_gemini_schema_uses_upper_case_types():
+    gemini = schemas.to_gemini_schema(CANDIDATE_SCHEMA)
+    assert gemini["type"] == "OBJECT"
+    assert gemini["properties"]["recommendations"]["items"]["properties"]["title"] == {"type": "STRING"}
+    assert "response_schema" not in schemas.generation_config(CANDIDATE_SCHEMA, native_schema=False)
+
+
+class _Reply:
+    usage_metadata = None
+
+    def __init__(self, text):
+        self.text = text
+
+
+class RepairingModel:
+    # First reply lacks executive_summary; the repair request supplies it
+    model_name = "models/repairing"
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        self.prompts.append(prompt)
+        if "previous reply" in prompt:
+            return _Reply('{"executive_summary": "Fits.", "match_score": 1}')
+        return _Reply('{"match_score": "85%", "match_level": "High", "strengths": [], "missing_skills": [],'
+                      ' "recommendations": []}')
+
+
+def test_generate_structured_repairs_missing_fields():
+    from llm import generate_structured
+
+    model = RepairingModel()
+    data = generate_structured(model, "Analyze this resume.", CANDIDATE_SCHEMA, use_cache=False)
+    assert data["match_score"] == 85 and data["executive_summary"] == "Fits."
+    assert len(model.prompts) == 2
+
+    model = RepairingModel()
+    assert generate_structured(model, "Analyze this resume.", CANDIDATE_SCHEMA, max_repairs=0, use_cache=False) is None
+    partial = generate_structured(model, "Analyze this resume.", CANDIDATE_SCHEMA, max_repairs=0, use_cache=False,
+                                  allow_partial=True)
+    assert "executive_summary" not in partial
@@ -0,0 +1,54 @@
+from utils import IncrementalJSONParser, clean_and_parse_json, is_complete_json
+
+
+def test_complete_object():
+    assert clean_and_parse_json('{"match_score": 85, "tags": ["a", "b"]}') == {
+        "match_score": 85,
+        "tags": ["a", "b"],
+    }
+    assert is_complete_json('{"a": 1}')
+
+
+def test_fences_and_trailing_commas():
+    reply = 'Sure!\n```json\n{"a": [1, 2,], "b": "x",}\n```'
+    assert clean_and_parse_json(reply) == {"a": [1, 2], "b": "x"}
+
+
+def test_truncated_number_counts_as_missing():
+    assert clean_and_parse_json('{"match_score": 8') == {}
+    assert clean_and_parse_json('{"a": "x", "match_score": 8') == {"a": "x"}
+
+
+def test_truncated_string_counts_as_missing():
+    assert clean_and_parse_json('{"a": 1, "match_level": "Hi') == {"a": 1}
+    assert not is_complete_json('{"a": 1, "match_level": "Hi')
+
+
+def test_truncated_reply_keeps_completed_fields():
+    reply = '{"match_score": 85, "skills": ["python", "sql"], "recommendations": ["Add'
+    assert clean_and_parse_json(reply) == {"match_score": 85, "skills": ["python", "sql"]}
+
+
+def test_partial_previews_half_written_string():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"summary": "Strong back') == {"summary": "Strong back"}
+    assert parser.result() == {}
+
+
+def test_bracket_in_prose_before_payload():
+    assert clean_and_parse_json('Here is the result [JSON]: {"a": 1}') == {"a": 1}
+    assert is_complete_json('Here is the result [JSON]: {"a": 1}')
+    assert clean_and_parse_json('See note [1 then {"a": 1}') == {"a": 1}
+
+
+def test_bracket_in_prose_across_chunks():
+    parser = IncrementalJSONParser()
+    for chunk in ["Result {see", " below}: ", '{"a": ', "1}"]:
+        parser.feed(chunk)
+    assert parser.complete
+    assert parser.result() == {"a": 1}
+
+
+def test_no_json():
+    assert clean_and_parse_json("no json here") is None
+    assert clean_and_parse_json("") is None
@@ -0,0 +1,26 @@
+from vector_index import ResumeIndex
+
+RESUMES = [
+    ("py.pdf", "python django backend engineer postgres", "fp-py"),
+    ("js.pdf", "javascript react frontend engineer css", "fp-js"),
+    ("ml.pdf", "python machine learning pytorch models", "fp-ml"),
+]
+
+
+def test_add_query_and_remove(tmp_path):
+    index = ResumeIndex(str(tmp_path / "index"))
+    assert index.add_many(RESUMES) == 3
+    assert index.add_many(RESUMES[:1]) == 0
+    assert index.query("python backend django", top_n=1)[0]["name"] == "py.pdf"
+
+    assert index.remove(["fp-py", "fp-unknown"]) == 1
+    assert [m["name"] for m in index.query("python backend django", top_n=5)][0] == "ml.pdf"
+    assert {e["fingerprint"] for e in index.entries()} == {"fp-js", "fp-ml"}
+
+    # The freed slot is reused and the index survives a reopen
+    assert index.add_many([("go.pdf", "golang kubernetes backend", "fp-go")]) == 1
+    reopened = ResumeIndex(str(tmp_path / "index"))
+    assert reopened.query("golang kubernetes", top_n=1)[0]["name"] == "go.pdf"
+    assert len(reopened) == 3
+    assert reopened.clear() == 3
+    assert reopened.query("python") == []
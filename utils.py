@@ -1,26 +1,250 @@
-import PyPDF2
+import hashlib
+import io
 import json
 import re
+import threading
+from collections import OrderedDict, deque
+
+import metrics
+
+# Extracted text is cached by a hash of the PDF bytes. The cache lives at
+# module level, so it survives Streamlit reruns and is shared by every tab.
+TEXT_CACHE_MAX_ENTRIES = 256
+TEXT_CACHE_MAX_CHARS = 20_000_000
+
+_text_cache = OrderedDict()
+_text_cache_chars = 0
+_text_cache_lock = threading.Lock()
+
+def read_pdf_bytes(pdf_file):
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    if hasattr(pdf_file, "getvalue"):
+        return pdf_file.getvalue()
+    if isinstance(pdf_file, str):
+        with open(pdf_file, "rb") as f:
+            return f.read()
+    pdf_file.seek(0)
+    return pdf_file.read()
+
+def file_fingerprint(data):
+    return hashlib.sha256(data).hexdigest()
+
+# Pages are joined with a form feed so later stages can see page boundaries
+PAGE_BREAK = "\f"
+
+def _parse_pdf_text(data):
+    import PyPDF2  # deferred: only needed once a PDF is actually parsed
+
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return PAGE_BREAK.join(page.extract_text() or "" for page in pdf_reader.pages)
+
+def cached_text(key):
+    with _text_cache_lock:
+        if key in _text_cache:
+            _text_cache.move_to_end(key)
+            return _text_cache[key]
+    return None
+
+def cache_text(key, text):
+    global _text_cache_chars
+    with _text_cache_lock:
+        if key in _text_cache:
+            return
+        _text_cache[key] = text
+        _text_cache_chars += len(text)
+        # Evict least recently used entries until both limits hold again
+        while len(_text_cache) > 1 and (
+            len(_text_cache) > TEXT_CACHE_MAX_ENTRIES or _text_cache_chars > TEXT_CACHE_MAX_CHARS
+        ):
+            _, evicted = _text_cache.popitem(last=False)
+            _text_cache_chars -= len(evicted)
 
 def extract_text_from_pdf(pdf_file):
-    pdf_reader = PyPDF2.PdfReader(pdf_file)
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text()
+    data = read_pdf_bytes(pdf_file)
+    key = file_fingerprint(data)
+    text = cached_text(key)
+    if text is None:
+        text = _parse_pdf_text(data)
+        cache_text(key, text)
     return text
 
+def clear_text_cache():
+    global _text_cache_chars
+    with _text_cache_lock:
+        _text_cache.clear()
+        _text_cache_chars = 0
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# A bracket in the prose before the payload ("[JSON]: {...}") starts a false
+# parse; the parser then retries from the next bracket, up to this many times
+MAX_JSON_RESTARTS = 32
+
+class IncrementalJSONParser:
+    # Consumes a model reply chunk by chunk and can return the best-effort
+    # object at any point. It skips prose and ```json fences around the
+    # payload, drops trailing commas, and closes strings, arrays and
+    # objects that were cut off, so a truncated reply still yields every
+    # field that was completed (e.g. match_score before recommendations).
+    # A value that was still being written when the reply ended is dropped
+    # from result(), so it counts as missing instead of as a wrong "8" or "Hi".
+    def __init__(self):
+        self.complete = False
+        self._pending = deque()
+        self._raw = []            # every char since the current start, for restarts
+        self._restarts = 0
+        self._buf = []
+        self._stack = []          # [opener, state] per open container
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._safe_cut = None     # (buffer length, closers) of the last complete element
+
+    def feed(self, chunk):
+        self._pending.extend(chunk)
+        self._drain()
+        return self.partial()
+
+    def _drain(self):
+        while self._pending and not self.complete:
+            self._consume(self._pending.popleft())
+
+    def _restart(self):
+        # Forget the current start and replay everything after its bracket
+        if not self._raw or self._restarts >= MAX_JSON_RESTARTS:
+            return False
+        self._restarts += 1
+        self._pending.extendleft(reversed(self._raw[1:]))
+        self.complete = False
+        self._raw = []
+        self._buf = []
+        self._stack = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._safe_cut = None
+        return True
+
+    def _closers(self):
+        return "".join(_CLOSERS[opener] for opener, _ in reversed(self._stack))
+
+    def _mark_safe(self):
+        self._safe_cut = (len(self._buf), self._closers())
+
+    def _value_done(self):
+        if self._stack and self._stack[-1][0] == "{":
+            self._stack[-1][1] = "comma"
+        self._mark_safe()
+
+    def _consume(self, ch):
+        if not self._started:
+            if ch not in _CLOSERS:
+                return
+            self._started = True
+        self._raw.append(ch)
+
+        if self._in_string:
+            self._buf.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._string_is_key:
+                    self._stack[-1][1] = "colon"
+                else:
+                    self._value_done()
+            return
+
+        if ch in _CLOSERS:
+            self._stack.append([ch, "key" if ch == "{" else "value"])
+            self._buf.append(ch)
+            if len(self._stack) == 1:
+                self._mark_safe()  # "{}": cut-off nested values stay missing
+        elif ch in "}]":
+            # Trailing commas ("a": 1, }) are dropped before closing
+            while self._buf and self._buf[-1].isspace():
+                self._buf.pop()
+            if self._buf and self._buf[-1] == ",":
+                self._buf.pop()
+            if not self._stack:
+                return
+            self._stack.pop()
+            self._buf.append(ch)
+            if not self._stack:
+                try:
+                    json.loads("".join(self._buf), strict=False)
+                except json.JSONDecodeError:
+                    self._restart()
+                    return
+                self.complete = True
+            self._value_done()
+        elif ch == '"':
+            self._string_is_key = bool(self._stack) and self._stack[-1] == ["{", "key"]
+            self._in_string = True
+            self._buf.append(ch)
+        elif ch == ",":
+            self._mark_safe()
+            if self._stack and self._stack[-1][0] == "{":
+                self._stack[-1][1] = "key"
+            self._buf.append(ch)
+        elif ch == ":":
+            if self._stack and self._stack[-1][0] == "{":
+                self._stack[-1][1] = "value"
+            self._buf.append(ch)
+        else:
+            self._buf.append(ch)
+
+    def _candidates(self, final):
+        text = "".join(self._buf)
+        if self.complete or not self._stack:
+            yield text
+            return
+        # Truncated: a live preview may show a half-written string value, but
+        # the final result only keeps elements that were complete, since a
+        # cut-off "85" or "High" would otherwise parse as a plausible 8 or "Hi".
+        if not final and self._in_string and not self._string_is_key:
+            yield text + '"' + self._closers()
+        if self._safe_cut:
+            cut, closers = self._safe_cut
+            yield text[:cut] + closers
+
+    def _parse(self, final):
+        for candidate in self._candidates(final):
+            try:
+                return json.loads(candidate, strict=False)
+            except json.JSONDecodeError:
+                continue
+        return None
+
+    def partial(self):
+        return self._parse(final=False)
+
+    def result(self):
+        data = self._parse(final=True)
+        while not isinstance(data, (dict, list)) and self._restart():
+            self._drain()
+            data = self._parse(final=True)
+        return data
+
 def clean_and_parse_json(response_text):
-    # Remove markdown code blocks (```json ... ```)
-    text = response_text.replace('```json', '').replace('```', '').strip()
-    
-    # Attempt to find the first '{' and last '}' to isolate JSON
-    start = text.find('{')
-    end = text.rfind('}') + 1
-    
-    if start != -1 and end != 0:
-        json_str = text[start:end]
-        try:
-            return json.loads(json_str)
-        except json.JSONDecodeError:
-            return None
-    return None
\ No newline at end of file
+    # Lenient parse of a complete reply; returns None if nothing usable is found
+    if not response_text:
+        return None
+    with metrics.timed("json parse"):
+        parser = IncrementalJSONParser()
+        parser.feed(response_text)
+        data = parser.result()
+    ok = isinstance(data, (dict, list))
+    outcome = "failed" if not ok else "ok" if parser.complete else "repaired"
+    metrics.registry.inc("jobfit_json_parse_total", outcome=outcome)
+    return data if ok else None
+
+def is_complete_json(response_text):
+    parser = IncrementalJSONParser()
+    parser.feed(response_text or "")
+    data = parser.result()  # may retry past a false start first
+    return parser.complete and data is not None
\ No newline at end of file
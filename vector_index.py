@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from llm_cache import CACHE_DIR
+from prescore import tokenize
+
+# Persistent resume index for instant retrieval before any LLM call. Vectors
+# live in a raw float32 file that is memory-mapped, and metadata (file name
+# and content hash, never the resume text) lives in SQLite. Resumes are only
+# added when the user asks, incrementally by content hash, and the file grows
+# by doubling, so the index is never rebuilt. Removed rows are zeroed and
+# their slots reused.
+INDEX_DIR = os.path.join(CACHE_DIR, "resume_index")
+INITIAL_CAPACITY = 256
+
+class HashingEmbedder:
+    # Offline default: signed feature hashing of unigrams and bigrams
+    def __init__(self, dim=2048):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        tokens = tokenize(text)
+        return Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = self._features(text)
+            if not counts:
+                continue
+            digests = [hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest() for f in counts]
+            hashes = np.frombuffer(b"".join(digests), dtype=np.uint64)
+            cols = (hashes % np.uint64(self.dim)).astype(np.int64)
+            signs = np.where((hashes >> np.uint64(63)) == 1, -1.0, 1.0)
+            weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64))
+            np.add.at(vectors[row], cols, (signs * weights).astype(np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+class ResumeIndex:
+    def __init__(self, path=INDEX_DIR, embedder=None):
+        self.path = path
+        self.embedder = embedder or HashingEmbedder()
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._info_path = os.path.join(path, "info.json")
+        self._db_path = os.path.join(path, "meta.sqlite3")
+
+        info = {"embedder": self.embedder.name, "dim": self.embedder.dim, "capacity": 0}
+        if os.path.exists(self._info_path):
+            with open(self._info_path, encoding="utf-8") as f:
+                info = json.load(f)
+            if info["embedder"] != self.embedder.name:
+                raise ValueError(f"Index at {path} was built with {info['embedder']}, not {self.embedder.name}")
+        self._capacity = info["capacity"]
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS resumes ("
+                "row INTEGER PRIMARY KEY, fingerprint TEXT UNIQUE NOT NULL, name TEXT NOT NULL, "
+                "added REAL NOT NULL)"
+            )
+        self._vectors = self._map() if self._capacity else None
+
+    def _connect(self):
+        db = sqlite3.connect(self._db_path, timeout=30)
+        db.execute("PRAGMA secure_delete = ON")  # removed names do not linger in free pages
+        return db
+
+    def _map(self):
+        return np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(self._capacity, self.embedder.dim))
+
+    def _ensure_capacity(self, rows):
+        if rows <= self._capacity:
+            return
+        capacity = max(INITIAL_CAPACITY, self._capacity)
+        while capacity < rows:
+            capacity *= 2
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        # Growing the raw file keeps existing rows in place
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.embedder.dim * 4)
+        self._capacity = capacity
+        self._vectors = self._map()
+        with open(self._info_path, "w", encoding="utf-8") as f:
+            json.dump({"embedder": self.embedder.name, "dim": self.embedder.dim, "capacity": capacity}, f)
+
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+
+    def add_many(self, items):
+        # items: (name, text, fingerprint) tuples. Returns how many were new.
+        with self._lock, self._connect() as db:
+            known = {row[0] for row in db.execute("SELECT fingerprint FROM resumes")}
+            fresh = {}
+            for name, text, fingerprint in items:
+                if fingerprint not in known and text and text.strip():
+                    fresh.setdefault(fingerprint, (name, text))
+            if not fresh:
+                return 0
+            # Slots freed by remove() are filled first
+            used = {row[0] for row in db.execute("SELECT row FROM resumes")}
+            rows = [r for r in range(len(used) + len(fresh)) if r not in used][:len(fresh)]
+            self._ensure_capacity(rows[-1] + 1)
+            vectors = self.embedder.embed([text for _, text in fresh.values()])
+            self._vectors[rows] = vectors
+            self._vectors.flush()
+            now = time.time()
+            db.executemany(
+                "INSERT INTO resumes (row, fingerprint, name, added) VALUES (?, ?, ?, ?)",
+                [(row, fp, name, now) for row, (fp, (name, _)) in zip(rows, fresh.items())],
+            )
+            return len(fresh)
+
+    def entries(self):
+        with self._connect() as db:
+            return [
+                {"name": name, "fingerprint": fingerprint, "added": added}
+                for fingerprint, name, added in db.execute("SELECT fingerprint, name, added FROM resumes ORDER BY added DESC, name")
+            ]
+
+    def remove(self, fingerprints):
+        # Deletes resumes from the index; returns how many were removed
+        fingerprints = list(fingerprints)
+        if not fingerprints:
+            return 0
+        placeholders = ",".join("?" * len(fingerprints))
+        with self._lock, self._connect() as db:
+            rows = [row[0] for row in db.execute(f"SELECT row FROM resumes WHERE fingerprint IN ({placeholders})", fingerprints)]
+            if not rows:
+                return 0
+            self._vectors[rows] = 0
+            self._vectors.flush()
+            db.execute(f"DELETE FROM resumes WHERE fingerprint IN ({placeholders})", fingerprints)
+            return len(rows)
+
+    def clear(self):
+        return self.remove(entry["fingerprint"] for entry in self.entries())
+
+    def query(self, text, top_n=10):
+        # Top-N most similar resumes to a JD (cosine similarity)
+        with self._lock:
+            with self._connect() as db:
+                meta = db.execute("SELECT row, fingerprint, name, added FROM resumes ORDER BY row").fetchall()
+            if not meta:
+                return []
+            q = self.embedder.embed([text])[0]
+            sims = np.asarray(self._vectors[[row for row, *_ in meta]]) @ q
+        top_n = min(top_n, len(meta))
+        best = np.argpartition(-sims, top_n - 1)[:top_n]
+        best = best[np.argsort(-sims[best])]
+        return [
+            {"name": meta[b][2], "fingerprint": meta[b][1], "similarity": float(sims[b]), "added": meta[b][3]}
+            for b in best
+        ]
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    # One index handle per process, shared by every session
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ResumeIndex()
+        return _index